@@ -0,0 +1,126 @@
+"""
+Write Batching for the Data Store Service
+
+This module coalesces concurrent single-row inserts into multi-row INSERTs.
+Each caller still awaits its own row, but under write bursts the database sees
+one ``INSERT ... RETURNING`` per batch instead of one INSERT plus one refresh
+SELECT (and one transaction) per document.
+
+A batch is flushed when it reaches ``max_batch_size`` rows or when
+``max_delay`` seconds have passed since its first row arrived, whichever comes
+first. A failed flush fails every caller in that batch.
+
+Usage:
+    from batcher import AsyncSqlalchemyWriteBatcher
+
+    document_writer = AsyncSqlalchemyWriteBatcher(
+        DocumentMetadata, SessionLocal, max_batch_size=50, max_delay=0.005
+    )
+
+    # In a request handler
+    db_document = await document_writer.add(document_data)
+
+    # On shutdown
+    await document_writer.close()
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+
+
+class AsyncSqlalchemyWriteBatcher:
+    """
+    Coalesce inserts for one ORM model into batched multi-row INSERTs.
+
+    Attributes:
+        model: ORM model class the rows are inserted into
+        session_factory: Callable returning an AsyncSession (e.g. async_sessionmaker)
+        max_batch_size: Flush as soon as this many rows are pending
+        max_delay: Longest time in seconds a row waits for its batch to fill
+    """
+
+    def __init__(self, model, session_factory, max_batch_size: int = 50, max_delay: float = 0.005):
+        """
+        Initialize the write batcher.
+
+        Args:
+            model: ORM model class to insert into
+            session_factory: Callable returning an AsyncSession
+            max_batch_size: Maximum number of rows per INSERT
+            max_delay: Maximum time in seconds to wait before flushing a partial batch
+        """
+        self.model = model
+        self.session_factory = session_factory
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._timer: Optional[asyncio.Task] = None
+        self._flushes: set = set()
+
+    async def add(self, row: Dict[str, Any]):
+        """
+        Queue a row for insertion and wait for its batch to be written.
+
+        Args:
+            row: Column values for the new row
+
+        Returns:
+            The inserted model instance, with server-generated columns populated
+
+        Raises:
+            Exception: Whatever the batched INSERT raised, if it failed
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((row, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_after_delay())
+
+        return await future
+
+    async def close(self) -> None:
+        """Flush any pending rows and wait for in-flight batches to finish."""
+        if self._pending:
+            self._start_flush()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    async def _flush_after_delay(self) -> None:
+        await asyncio.sleep(self.max_delay)
+        self._timer = None
+        if self._pending:
+            self._start_flush()
+
+    def _start_flush(self) -> None:
+        # Detach the current batch so new rows start a fresh one while this is written
+        batch, self._pending = self._pending, []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        task = asyncio.create_task(self._flush(batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        rows = [row for row, _ in batch]
+        try:
+            async with self.session_factory() as session:
+                # sort_by_parameter_order guarantees RETURNING rows line up with `rows`
+                stmt = insert(self.model).returning(self.model, sort_by_parameter_order=True)
+                result = await session.scalars(stmt, rows)
+                instances = result.all()
+                await session.commit()
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), instance in zip(batch, instances):
+            if not future.done():
+                future.set_result(instance)
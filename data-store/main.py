@@ -1,102 +1,161 @@
+import copy
 import logging
+import os
 import time
-from datetime import datetime
+from datetime import datetime, timezone
 
 import models
-from database import engine, get_db
-from fastapi import Depends, FastAPI, HTTPException, Request, Response
+from batcher import AsyncSqlalchemyWriteBatcher
+from database import SessionLocal, engine, get_db, settings
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.responses import ORJSONResponse
 from models import DocumentMetadata
 from schemas import DocumentMetadataCreate, DocumentMetadataResponse
-from sqlalchemy.orm import Session
 from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from telemetry import init_observability
+from telemetry import get_correlation_id, init_observability
 from observability import (
     ObservabilityMiddleware, 
-    log_request_metrics, 
     create_span, 
     log_with_context,
     create_health_metrics,
+    enable_queue_logging,
+    OrjsonFormatter,
     track_db_operation
 )
 
-# Create tables
-models.Base.metadata.create_all(bind=engine)
+app = FastAPI(
+    title="Data Store API",
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+)
+
+@app.on_event("startup")
+async def create_tables():
+    """
+    Create tables on startup when AUTO_CREATE_TABLES=1.
+    
+    The schema is normally managed by Alembic (run before uvicorn starts), so
+    workers skip the reflection round-trip to Postgres unless asked for it.
+    """
+    if os.getenv("AUTO_CREATE_TABLES") != "1":
+        return
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+
+# Concurrent document inserts are coalesced into multi-row INSERT ... RETURNING
+document_writer = AsyncSqlalchemyWriteBatcher(
+    DocumentMetadata,
+    SessionLocal,
+    max_batch_size=settings.write_batch_size,
+    max_delay=settings.write_batch_window_ms / 1000,
+)
 
-app = FastAPI(title="Data Store API", version="1.0.0")
+@app.on_event("shutdown")
+async def flush_document_writer():
+    """Write out any batched inserts before the process exits."""
+    await document_writer.close()
 
 # Add observability middleware
 app.add_middleware(ObservabilityMiddleware)
 
-logging.basicConfig(level=logging.INFO)
+# Structured JSON log lines, serialized with orjson
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(OrjsonFormatter())
+logging.basicConfig(level=logging.INFO, handlers=[_log_handler])
+# Write log output from a background thread rather than in request handlers
+enable_queue_logging()
 logger = logging.getLogger(__name__)
 
 # Create health metrics
 health_check_counter, health_check_duration = create_health_metrics()
 
-@app.middleware("http")
-async def add_process_time_header(request: Request, call_next):
-    """Middleware to add process time header and log metrics."""
-    start_time = time.time()
-    
-    # Process the request
-    response = await call_next(request)
-    
-    # Calculate duration
-    process_time = time.time() - start_time
-    response.headers["X-Process-Time"] = str(process_time)
-    
-    # Log metrics
-    log_request_metrics(request, response, process_time)
-    
-    return response
+# Health probe results are cached so that probe storms (liveness/readiness checks
+# plus UI polling) don't turn into a steady stream of round-trips to Postgres.
+# The response is kept for less than a typical probe interval, while table
+# existence changes only with migrations and can be cached much longer.
+HEALTH_CACHE_TTL = 5.0
+TABLES_CACHE_TTL = 300.0
+_HEALTH_CACHE = {"expires": 0.0, "payload": None}
+_TABLES_CACHE = {"expires": 0.0, "status": None}
+
+_PING_QUERY = text("SELECT 1")
+
+# Connectivity and table existence probed in one round-trip
+_READINESS_QUERY = text("""
+    SELECT 1, EXISTS (
+        SELECT FROM information_schema.tables 
+        WHERE table_name = 'document_metadata'
+    )
+""")
+
+# Static skeleton of the readiness response; only the mutable fields are
+# filled in per probe (key order matches the published response)
+_HEALTH_TEMPLATE = {
+    "status": None,
+    "service": "data-store",
+    "timestamp": None,
+    "components": None,
+    "version": "1.0.0"
+}
 
+# Liveness response never changes, so it is built once
+_LIVEZ_PAYLOAD = {"status": "ok"}
+
+@app.get("/livez")
+async def liveness_check():
+    """Liveness probe: reports that the process is up without touching the database."""
+    return _LIVEZ_PAYLOAD
+
+@app.get("/readyz")
 @app.get("/health")
-async def health_check():
-    """Enhanced health check endpoint with database connectivity and detailed status."""
-    start_time = time.time()
+async def health_check(db: AsyncSession = Depends(get_db)):
+    """
+    Readiness check with database connectivity and detailed status.
+    
+    Also served as /health for backward compatibility.
+    """
+    start_time = time.perf_counter()
+    
+    # Serve the cached result while it is still fresh
+    if time.monotonic() < _HEALTH_CACHE["expires"]:
+        payload = _HEALTH_CACHE["payload"]
+        health_check_counter.add(1, {"status": payload["status"], "cached": "true"})
+        health_check_duration.record(time.perf_counter() - start_time)
+        return payload
     
     try:
-        # Check database connectivity (simplified to avoid connection pool issues)
+        # Check database connectivity and table existence with a single session
+        # and, when the table status isn't cached, a single round-trip
         db_status = "unknown"
         db_latency = 0
+        tables_status = "unknown"
+        tables_cached = time.monotonic() < _TABLES_CACHE["expires"]
+        if tables_cached:
+            tables_status = _TABLES_CACHE["status"]
         
         try:
-            db = next(get_db())
-            # Test database connection with a simple query
-            result = db.execute(text("SELECT 1"))
-            result.fetchone()
+            if tables_cached:
+                await db.scalar(_PING_QUERY)
+            else:
+                _, table_exists = (await db.execute(_READINESS_QUERY)).one()
+                tables_status = "healthy" if table_exists else "missing_tables"
+                
+                _TABLES_CACHE["status"] = tables_status
+                _TABLES_CACHE["expires"] = time.monotonic() + TABLES_CACHE_TTL
+            
             db_status = "healthy"
-            db_latency = time.time() - start_time
-            db.close()  # Explicitly close the connection
+            db_latency = time.perf_counter() - start_time
         except Exception as e:
             db_status = "unhealthy"
+            if not tables_cached:
+                tables_status = "unhealthy"
             log_with_context(
                 f"Database health check failed: {str(e)}",
                 level="error"
             )
         
-        # Check table existence (simplified)
-        tables_status = "unknown"
-        try:
-            db = next(get_db())
-            # Check if our main table exists
-            result = db.execute(text("""
-                SELECT EXISTS (
-                    SELECT FROM information_schema.tables 
-                    WHERE table_name = 'document_metadata'
-                )
-            """))
-            table_exists = result.fetchone()[0]
-            tables_status = "healthy" if table_exists else "missing_tables"
-            db.close()  # Explicitly close the connection
-        except Exception as e:
-            tables_status = "unhealthy"
-            log_with_context(
-                f"Table check failed: {str(e)}",
-                level="error"
-            )
-        
         # Overall health
         overall_status = "healthy"
         if db_status != "healthy" or tables_status != "healthy":
@@ -106,7 +165,7 @@ async def health_check():
         
         # Record metrics
         health_check_counter.add(1, {"status": overall_status})
-        health_check_duration.record(time.time() - start_time)
+        health_check_duration.record(time.perf_counter() - start_time)
         
         log_with_context(
             "Health check completed",
@@ -117,23 +176,25 @@ async def health_check():
             db_latency=db_latency
         )
         
-        return {
-            "status": overall_status,
-            "service": "data-store",
-            "timestamp": datetime.now().isoformat(),
-            "components": {
-                "database": {
-                    "status": db_status,
-                    "latency_ms": round(db_latency * 1000, 2) if db_latency > 0 else None
-                },
-                "tables": tables_status
+        payload = copy.copy(_HEALTH_TEMPLATE)
+        payload["status"] = overall_status
+        payload["timestamp"] = datetime.now(timezone.utc)
+        payload["components"] = {
+            "database": {
+                "status": db_status,
+                "latency_ms": round(db_latency * 1000, 2) if db_latency > 0 else None
             },
-            "version": "1.0.0"
+            "tables": tables_status
         }
         
+        _HEALTH_CACHE["payload"] = payload
+        _HEALTH_CACHE["expires"] = time.monotonic() + HEALTH_CACHE_TTL
+        
+        return payload
+        
     except Exception as e:
         health_check_counter.add(1, {"status": "unhealthy"})
-        health_check_duration.record(time.time() - start_time)
+        health_check_duration.record(time.perf_counter() - start_time)
         
         log_with_context(
             f"Health check failed: {str(e)}",
@@ -144,31 +205,31 @@ async def health_check():
             "status": "unhealthy",
             "service": "data-store",
             "error": str(e),
-            "timestamp": datetime.now().isoformat()
+            "timestamp": datetime.now(timezone.utc)
         }
 
 @app.post("/clients/{client_id}/documents", response_model=DocumentMetadataResponse)
 async def create_client_document_metadata(
     client_id: str, 
-    document: DocumentMetadataCreate, 
-    db: Session = Depends(get_db)
+    document: DocumentMetadataCreate
 ):
     """Store document metadata for a specific client with comprehensive tracing."""
-    with create_span("create_document", "document_creation", client_id=client_id) as span:
+    # Read the correlation ID once and pass it to every span/log below
+    correlation_id = get_correlation_id()
+    with create_span("create_document", "document_creation", correlation_id=correlation_id, client_id=client_id) as span:
         try:
             document_data = document.dict()
             document_data["client_id"] = client_id
             
-            span.set_attribute("document_keys", list(document_data.keys()))
-            span.set_attribute("filename", document_data.get("filename"))
-            span.set_attribute("file_size", document_data.get("file_size"))
+            # Only build the attribute values when the span is being recorded
+            if span.is_recording():
+                span.set_attribute("document_keys", list(document_data.keys()))
+                span.set_attribute("filename", document_data.get("filename"))
+                span.set_attribute("file_size", document_data.get("file_size"))
             
-            # Store in database with tracking
-            with track_db_operation("insert", "documentmetadata", client_id=client_id) as db_tracker:
-                db_document = DocumentMetadata(**document_data)
-                db.add(db_document)
-                db.commit()
-                db.refresh(db_document)
+            # Store in database with tracking (the insert is batched with concurrent requests)
+            with track_db_operation("insert", "documentmetadata", correlation_id=correlation_id, client_id=client_id) as db_tracker:
+                db_document = await document_writer.add(document_data)
                 
                 db_tracker.span.set_attribute("document_id", db_document.id)
             
@@ -178,6 +239,7 @@ async def create_client_document_metadata(
             log_with_context(
                 "Document metadata stored successfully",
                 level="info",
+                correlation_id=correlation_id,
                 client_id=client_id,
                 document_id=db_document.id,
                 file_name=document_data.get("filename")
@@ -192,10 +254,10 @@ async def create_client_document_metadata(
             log_with_context(
                 f"Error storing document metadata: {str(e)}",
                 level="error",
+                correlation_id=correlation_id,
                 client_id=client_id
             )
             
-            db.rollback()
             raise HTTPException(status_code=500, detail="Failed to store document metadata")
 
 @app.get(
@@ -205,21 +267,20 @@ async def create_client_document_metadata(
 async def get_document_metadata(
     client_id: str, 
     document_id: int, 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Retrieve document metadata by client ID and document ID with tracing."""
-    with create_span("get_document", "document_retrieval", client_id=client_id, document_id=document_id) as span:
+    # Read the correlation ID once and pass it to every span/log below
+    correlation_id = get_correlation_id()
+    with create_span("get_document", "document_retrieval", correlation_id=correlation_id, client_id=client_id, document_id=document_id) as span:
         try:
             # Query database with tracking
-            with track_db_operation("select", "documentmetadata", client_id=client_id, document_id=document_id) as db_tracker:
-                document = (
-                    db.query(DocumentMetadata)
-                    .filter(
-                        DocumentMetadata.client_id == client_id, 
-                        DocumentMetadata.id == document_id
-                    )
-                    .first()
-                )
+            with track_db_operation("select", "documentmetadata", correlation_id=correlation_id, client_id=client_id, document_id=document_id) as db_tracker:
+                # Primary-key lookup (served from the identity map when already
+                # loaded); ownership is checked here rather than in SQL
+                document = await db.get(DocumentMetadata, document_id)
+                if document is not None and document.client_id != client_id:
+                    document = None
                 
                 if not document:
                     db_tracker.span.set_attribute("found", False)
@@ -229,6 +290,7 @@ async def get_document_metadata(
                     log_with_context(
                         "Document not found",
                         level="warning",
+                        correlation_id=correlation_id,
                         client_id=client_id,
                         document_id=document_id
                     )
@@ -247,6 +309,7 @@ async def get_document_metadata(
             log_with_context(
                 "Document metadata retrieved successfully",
                 level="info",
+                correlation_id=correlation_id,
                 client_id=client_id,
                 document_id=document_id,
                 file_name=document.filename
@@ -265,15 +328,30 @@ async def get_document_metadata(
             log_with_context(
                 f"Error retrieving document metadata: {str(e)}",
                 level="error",
+                correlation_id=correlation_id,
                 client_id=client_id,
                 document_id=document_id
             )
             
             raise HTTPException(status_code=500, detail="Failed to retrieve document metadata")
 
-init_observability()
+init_observability(app)
 
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # uvloop/httptools come with uvicorn[standard]; the access log is disabled
+    # because ObservabilityMiddleware already logs and measures every request.
+    # Multiple workers need the app as an import string.
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop",
+        http="httptools",
+        access_log=False,
+        proxy_headers=False,
+        server_header=False,
+        date_header=False,
+        workers=int(os.getenv("WEB_CONCURRENCY", "2")),
+    )
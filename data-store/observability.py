@@ -57,15 +57,29 @@ Usage:
     log_with_context("Message", level="info", **context_data)
 """
 
+import os
 import time
+import functools
+import atexit
+import copy
+import queue
 import logging
-from typing import Callable
-from fastapi import Request, Response
+import logging.handlers
+from typing import Callable, Optional
+import orjson
+from starlette.datastructures import MutableHeaders
 from opentelemetry import trace, metrics
-from opentelemetry.trace import SpanKind
+from opentelemetry.trace import SpanKind, Status, StatusCode
 from opentelemetry.sdk.trace import Tracer
 from opentelemetry.sdk.metrics import Meter
-from telemetry import get_correlation_id, set_correlation_id, generate_correlation_id
+from telemetry import (
+    get_correlation_id,
+    set_correlation_id,
+    reset_correlation_id,
+    generate_correlation_id,
+    correlation_id_from_traceparent,
+    TRACE_SAMPLE_RATIO
+)
 
 # Get the global tracer and meter instances for this service
 # These are configured in telemetry.py and provide the core observability infrastructure
@@ -120,11 +134,171 @@ db_operation_duration = meter.create_histogram(
     unit="s"  # Time in seconds
 )
 
+# Observability can be switched off with the standard OTEL_SDK_DISABLED=true or
+# with OTEL_ENABLED=0. When off, track_db_operation, create_span and
+# log_request_metrics skip span/metric construction entirely.
+_OBS_ENABLED = (
+    os.getenv("OTEL_SDK_DISABLED", "false").lower() != "true"
+    and os.getenv("OTEL_ENABLED", "1") != "0"
+)
+
+# Service attribution shared by every metric point and span emitted here;
+# per-call attributes are merged on top of this dict, never into it
+_BASE_ATTRS = {"service": "data-store", "service_type": "database_service"}
+
+# With a zero sampling ratio no span is ever recorded, so create_span can skip
+# the tracer entirely
+_SAMPLER_DROPS_ALL = TRACE_SAMPLE_RATIO <= 0
+
+# Header names looked up on every request; ASGI header names are lowercase bytes
+_USER_AGENT = b"user-agent"
+_TRACEPARENT = b"traceparent"
+
+@functools.lru_cache(maxsize=1024)
+def _decode_ua(raw: bytes) -> str:
+    """
+    Decode a raw user-agent header for logging.
+    
+    Real traffic repeats a few hundred user agents, so decoded strings are
+    cached. latin-1 never fails and matches ASCII byte for byte; the value is
+    capped at 256 bytes so pathological headers stay bounded.
+    """
+    return raw[:256].decode("latin-1", "replace")
+
+# Shared default for scope lookups that may miss (e.g. a request without headers)
+_EMPTY: tuple = ()
+
+# log_with_context level names mapped to logging levels
+_LEVEL_MAP = {
+    "debug": logging.DEBUG,
+    "info": logging.INFO,
+    "warning": logging.WARNING,
+    "error": logging.ERROR,
+    "critical": logging.CRITICAL,
+}
+
 # Create structured logger with consistent formatting
 # This logger will include correlation IDs and context in all log entries
 # Database operations are logged with detailed context for debugging
 logger = logging.getLogger(__name__)
 
+class _RequestContextFilter(logging.Filter):
+    """
+    Attach the request context (correlation ID and service attribution) to
+    every record emitted through this module's logger.
+    
+    Doing this once in the logging pipeline means call sites don't rebuild
+    these keys in an ``extra`` dict for every message, and records dropped by
+    the level check never pay for them at all.
+    """
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        # Callers that already know the correlation ID pass it via extra
+        if not hasattr(record, "correlation_id"):
+            record.correlation_id = get_correlation_id()
+        record.service = "data-store"
+        record.service_type = "database_service"
+        return True
+
+logger.addFilter(_RequestContextFilter())
+
+# Attributes every LogRecord has; anything else on a record came from extra=
+# or from _RequestContextFilter and is emitted as a structured field
+_RECORD_ATTRS = frozenset(logging.makeLogRecord({}).__dict__) | {"message", "asctime"}
+
+class OrjsonFormatter(logging.Formatter):
+    """
+    Format log records as single-line JSON using orjson.
+    
+    The output carries the message, level and logger name plus every
+    structured field attached to the record (the ``extra`` payloads of
+    ObservabilityMiddleware and log_with_context, and the request context
+    added by _RequestContextFilter). Values orjson can't serialize natively
+    are written with str().
+    """
+    
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "msg": record.getMessage(),
+            "level": record.levelname,
+            "logger": record.name,
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                payload[key] = value
+        
+        # Records that went through _StructuredQueueHandler carry the
+        # traceback already rendered in exc_text
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload["exc_info"] = record.exc_text
+        
+        return orjson.dumps(payload, default=str).decode()
+
+class _StructuredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that keeps the traceback out of the message.
+    
+    The stock prepare() formats the record with a plain Formatter, which
+    appends the traceback to msg and clears exc_info, so OrjsonFormatter on
+    the listener side would find the traceback inside "msg" instead of in its
+    own field. Here only the arguments are merged into msg (they may not be
+    safe to read later from another thread) and the traceback is rendered
+    into exc_text.
+    """
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # Traceback objects hold the frames alive; keep only the text
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+def enable_queue_logging() -> Optional[logging.handlers.QueueListener]:
+    """
+    Move log output off the request path.
+    
+    The root logger's current handlers (e.g. the stream handler installed by
+    logging.basicConfig) are moved behind a QueueHandler. Request handling
+    only enqueues records; formatting and writing happen on a background
+    QueueListener thread. The listener is stopped (and the queue drained) at
+    interpreter exit.
+    
+    Call once at startup, after the handlers have been configured.
+    
+    Returns:
+        QueueListener: The started listener, or None if the root logger had
+        no handlers to move
+    """
+    root = logging.getLogger()
+    handlers = [h for h in root.handlers if not isinstance(h, logging.handlers.QueueHandler)]
+    if not handlers:
+        return None
+    
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    
+    root.handlers = [_StructuredQueueHandler(log_queue)]
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+def _request_log_extra(scope: dict, correlation_id: str, user_agent: bytes) -> dict:
+    """Build the request fields shared by the request start and completion logs."""
+    # Extract client information for security and debugging
+    client = scope.get("client")
+    return {
+        "correlation_id": correlation_id,
+        "method": scope["method"],
+        "path": scope["path"],
+        "client_ip": client[0] if client else "unknown",
+        "user_agent": _decode_ua(user_agent),
+    }
+
 class ObservabilityMiddleware:
     """
     Middleware for adding comprehensive observability to FastAPI requests in the data-store service.
@@ -132,8 +306,9 @@ class ObservabilityMiddleware:
     This middleware is the foundation of the observability system for database operations. It:
     1. Generates a unique correlation ID for each request
     2. Injects this ID into the request context
-    3. Logs request start with full context
-    4. Enables distributed tracing across all services and database operations
+    3. Logs request completion with full context (request start at DEBUG)
+    4. Adds the X-Process-Time response header and records request metrics
+    5. Enables distributed tracing across all services and database operations
     
     The correlation ID flows through the entire request lifecycle, allowing
     engineers to trace requests from the load balancer through the data-store service
@@ -141,9 +316,10 @@ class ObservabilityMiddleware:
     analysis and troubleshooting.
     
     Architecture:
-    - Generates UUID4 correlation ID for each request
+    - Uses the inbound traceparent trace ID as the correlation ID, or
+      generates a random one when the request carries no trace context
     - Sets correlation ID in async context for the request duration
-    - Logs request start with method, path, client IP, and user agent
+    - Logs request completion with method, path, client IP, user agent, status and duration
     - Preserves all existing FastAPI functionality
     - Enables correlation between HTTP requests and database operations
     
@@ -178,8 +354,9 @@ class ObservabilityMiddleware:
         This method is called for every HTTP request and:
         1. Generates a unique correlation ID
         2. Sets it in the async context
-        3. Logs request start information
+        3. Logs request start (DEBUG) and completion information
         4. Processes the request normally
+        5. Adds X-Process-Time to the response and records request metrics
         
         The correlation ID is particularly important for database operations
         as it links HTTP requests to database queries for performance analysis.
@@ -199,43 +376,47 @@ class ObservabilityMiddleware:
             tracing of database performance and operations.
         """
         if scope["type"] == "http":
-            # Generate a unique correlation ID for this request
+            # Read the headers we need in a single pass
+            user_agent = b""
+            traceparent = None
+            for name, value in scope.get("headers", _EMPTY):
+                if name == _USER_AGENT:
+                    user_agent = value
+                elif name == _TRACEPARENT:
+                    traceparent = value
+            
+            # Use the caller's trace ID as the correlation ID when there is one,
+            # otherwise generate a unique one for this request
             # This ID will be used throughout the entire request lifecycle
             # including all database operations performed during the request
-            correlation_id = generate_correlation_id()
-            set_correlation_id(correlation_id)
+            correlation_id = correlation_id_from_traceparent(traceparent) or generate_correlation_id()
+            correlation_token = set_correlation_id(correlation_id)
             
             # Add correlation ID to scope for potential use by other middleware
             # This allows other components to access the correlation ID
             # and link their operations to the same request
             scope["correlation_id"] = correlation_id
             
+            start_time = time.perf_counter()
+            status_code = 500  # Reported if the app fails before sending a response
+            
             # Create a custom send function to capture response information
-            # This allows us to log request start when the response begins
+            # This allows us to add headers and log when the response begins
             async def custom_send(message):
+                nonlocal status_code
                 if message["type"] == "http.response.start":
-                    # Extract client information for security and debugging
-                    client_ip = scope.get("client", ("unknown", 0))[0]
+                    status_code = message["status"]
                     
-                    # Extract user agent for client identification
-                    headers = dict(scope.get("headers", []))
-                    user_agent = headers.get(b"user-agent", b"").decode()
+                    # Expose the processing time to clients
+                    process_time = time.perf_counter() - start_time
+                    MutableHeaders(scope=message).append("X-Process-Time", str(process_time))
                     
-                    # Log request start with comprehensive context
-                    # This provides immediate visibility into incoming requests
-                    # and helps correlate HTTP requests with database operations
-                    logger.info(
-                        "Request started",
-                        extra={
-                            "correlation_id": correlation_id,
-                            "method": scope["method"],
-                            "path": scope["path"],
-                            "client_ip": client_ip,
-                            "user_agent": user_agent,
-                            "request_type": "http_start",
-                            "service": "data-store"
-                        }
-                    )
+                    # Request start is only logged at DEBUG; the completion log
+                    # below carries the same details plus status and duration
+                    if logger.isEnabledFor(logging.DEBUG):
+                        extra = _request_log_extra(scope, correlation_id, user_agent)
+                        extra["request_type"] = "http_start"
+                        logger.debug("Request started", extra=extra)
                 
                 # Forward the message to the original send function
                 await send(message)
@@ -243,13 +424,72 @@ class ObservabilityMiddleware:
             # Process the request through the wrapped application
             # All subsequent operations will have access to the correlation ID
             # This includes all database operations performed during the request
-            await self.app(scope, receive, custom_send)
+            try:
+                await self.app(scope, receive, custom_send)
+            finally:
+                duration = time.perf_counter() - start_time
+                log_request_metrics(scope, status_code, duration)
+                
+                # Log request completion with comprehensive context
+                # This is the single per-request log line and helps correlate
+                # HTTP requests with database operations
+                if logger.isEnabledFor(logging.INFO):
+                    extra = _request_log_extra(scope, correlation_id, user_agent)
+                    extra["status_code"] = status_code
+                    extra["duration"] = duration
+                    extra["request_type"] = "http_complete"
+                    logger.info("Request completed", extra=extra)
+                
+                # Restore the previous value so the request's ID doesn't leak
+                # into whatever runs next in this context
+                reset_correlation_id(correlation_token)
         else:
             # For non-HTTP requests (WebSocket, etc.), pass through unchanged
             # This ensures the middleware doesn't interfere with other protocols
             await self.app(scope, receive, send)
 
-def log_request_metrics(request: Request, response: Response, duration: float):
+# Path label for requests that matched no route. Unmatched paths (typos,
+# scanners probing /.env, /wp-admin/...) are chosen by the client, so they
+# share one label instead of each creating a time series; the raw path is
+# still in the request logs
+_UNMATCHED_ROUTE = "<unmatched>"
+
+def _route_template(scope: dict) -> str:
+    """
+    Return the matched route template for a request (e.g. "/clients/{client_id}/documents").
+    
+    The router stores the matched route in the scope, so this is only
+    available once the request has been routed. Unmatched requests (404s)
+    all get the "<unmatched>" label.
+    """
+    route = scope.get("route")
+    return getattr(route, "path", _UNMATCHED_ROUTE)
+
+# Metric attribute dicts are memoized per label combination. The label space
+# (method x route template x status, operation x table x success) is small, so
+# repeat requests reuse the same dict instead of building and hashing a new one.
+# The returned dicts are shared and must not be mutated.
+
+@functools.lru_cache(maxsize=2048)
+def _request_attrs(method: str, path: str) -> dict:
+    return {
+        **_BASE_ATTRS,                      # Service attribution
+        "method": method,                   # HTTP method (GET, POST, PUT, etc.)
+        "path": path,                       # Route template (/health, /clients/{client_id}/documents, etc.)
+    }
+
+@functools.lru_cache(maxsize=2048)
+def _request_status_attrs(method: str, path: str, status_code: int) -> dict:
+    return {**_request_attrs(method, path), "status_code": str(status_code)}
+
+@functools.lru_cache(maxsize=2048)
+def _request_error_attrs(method: str, path: str, status_code: int) -> dict:
+    return {
+        **_request_status_attrs(method, path, status_code),
+        "error_category": "4xx" if status_code < 500 else "5xx"  # Error classification
+    }
+
+def log_request_metrics(scope: dict, status_code: int, duration: float):
     """
     Log comprehensive metrics for an HTTP request in the data-store service.
     
@@ -258,14 +498,17 @@ def log_request_metrics(request: Request, response: Response, duration: float):
     - Request duration for performance monitoring
     - Error tracking for 4xx and 5xx responses
     
-    All metrics include the correlation ID for request correlation and
-    the ability to trace specific requests through the metrics. This is
-    particularly important for correlating HTTP requests with database
-    operations and performance.
+    Metric attributes are kept low-cardinality (method, path, status). The
+    per-request correlation ID is deliberately not a metric label, since it
+    would create one time series per request; it is carried on spans and
+    structured logs instead, which is where requests are correlated with
+    database operations.
+    
+    Called by ObservabilityMiddleware once the request has been handled.
     
     Args:
-        request: FastAPI Request object containing request details
-        response: FastAPI Response object containing response details
+        scope: ASGI scope of the request
+        status_code: HTTP status code of the response
         duration: Request duration in seconds (float)
         
     Metrics Collected:
@@ -273,59 +516,34 @@ def log_request_metrics(request: Request, response: Response, duration: float):
         - http_request_duration_seconds: Request duration histogram
         - http_errors_total: Count of error responses
         
-    Database Correlation:
-        The correlation ID links HTTP requests to database operations,
-        enabling engineers to identify which requests cause database
-        performance issues or errors.
-        
     Example:
-        >>> log_request_metrics(request, response, 0.125)
+        >>> log_request_metrics(scope, 200, 0.125)
         >>> # Records: 1 request, 0.125s duration, error status if applicable
-        >>> # Links to database operations with the same correlation ID
     """
-    # Get the correlation ID for this request
-    # This links all metrics to the specific request being processed
-    # and enables correlation with database operation metrics
-    correlation_id = get_correlation_id()
+    if not _OBS_ENABLED:
+        return
+    
+    # The path is the route template rather than the raw URL so that IDs in
+    # the URL don't become label values
+    method = scope["method"]
+    path = _route_template(scope)
     
     # Increment the total request counter
     # This tracks overall request volume and can be used for capacity planning
-    # The correlation ID links this metric to specific database operations
-    request_counter.add(1, {
-        "method": request.method,           # HTTP method (GET, POST, PUT, etc.)
-        "path": request.url.path,           # Request path (/health, /documents, etc.)
-        "status_code": str(response.status_code),  # Response status (200, 404, 500, etc.)
-        "correlation_id": correlation_id,   # Links metrics to specific requests
-        "service": "data-store",           # Service identifier for multi-service monitoring
-        "service_type": "database_service" # Indicates this is a database service
-    })
+    request_counter.add(1, _request_status_attrs(method, path, status_code))
     
     # Record request duration in the histogram
     # This provides detailed performance analysis including percentiles
     # Database-heavy requests will show longer durations, helping identify bottlenecks
-    request_duration.record(duration, {
-        "method": request.method,           # HTTP method for method-specific performance
-        "path": request.url.path,           # Path for endpoint-specific performance
-        "correlation_id": correlation_id,   # Request correlation
-        "service": "data-store",           # Service attribution
-        "service_type": "database_service" # Service type for monitoring
-    })
+    request_duration.record(duration, _request_attrs(method, path))
     
     # Increment error counter for 4xx and 5xx status codes
     # This tracks error rates and helps identify problematic endpoints
     # Database errors (e.g., connection failures, query errors) will be captured here
-    if response.status_code >= 400:
-        error_counter.add(1, {
-            "method": request.method,           # HTTP method for error analysis
-            "path": request.url.path,           # Endpoint for error localization
-            "status_code": str(response.status_code),  # Specific error type
-            "correlation_id": correlation_id,   # Links errors to specific requests
-            "service": "data-store",           # Service attribution
-            "service_type": "database_service", # Service type for error categorization
-            "error_category": "4xx" if response.status_code < 500 else "5xx"  # Error classification
-        })
-
-def create_span(name: str, operation: str, **attributes):
+    if status_code >= 400:
+        error_counter.add(1, _request_error_attrs(method, path, status_code))
+
+def create_span(name: str, operation: str, correlation_id: Optional[str] = None, **attributes):
     """
     Create a custom span for distributed tracing in the data-store service.
     
@@ -341,6 +559,8 @@ def create_span(name: str, operation: str, **attributes):
     Args:
         name (str): Human-readable name for the span (e.g., "create_document")
         operation (str): Type of operation (e.g., "document_creation", "data_operation")
+        correlation_id (str, optional): Correlation ID of the request, if the caller
+            already has it; otherwise it is read from the request context
         **attributes: Additional key-value pairs to attach to the span
         
     Returns:
@@ -366,8 +586,21 @@ def create_span(name: str, operation: str, **attributes):
         - Monitor database connection usage
         - Debug database-related errors
     """
+    # Non-recording span: still usable as a context manager and accepts
+    # set_attribute calls, but records and exports nothing
+    if not _OBS_ENABLED or _SAMPLER_DROPS_ALL:
+        return trace.INVALID_SPAN
+    
+    # The request's trace was sampled out, so this (ParentBased-sampled) span
+    # will not be recorded either; don't build its attributes
+    parent_context = trace.get_current_span().get_span_context()
+    if parent_context.is_valid and not parent_context.trace_flags.sampled:
+        return tracer.start_span(name=name, kind=SpanKind.INTERNAL)
+    
     # Get the current correlation ID to link this span to the request
-    correlation_id = get_correlation_id()
+    # (skipping the context lookup when the caller passed it in)
+    if correlation_id is None:
+        correlation_id = get_correlation_id()
     
     # Build comprehensive span attributes
     # These attributes provide context for debugging and monitoring
@@ -375,8 +608,7 @@ def create_span(name: str, operation: str, **attributes):
     span_attributes = {
         "correlation_id": correlation_id,    # Links span to specific request
         "operation": operation,              # Operation type for categorization
-        "service": "data-store",            # Service attribution
-        "service_type": "database_service", # Service type for monitoring
+        **_BASE_ATTRS,                       # Service attribution
         **attributes                         # Additional custom attributes
     }
     
@@ -389,7 +621,7 @@ def create_span(name: str, operation: str, **attributes):
         attributes=span_attributes
     )
 
-def log_with_context(message: str, level: str = "info", **kwargs):
+def log_with_context(message: str, level: str = "info", correlation_id: Optional[str] = None, **kwargs):
     """
     Log a message with correlation ID and additional context in the data-store service.
     
@@ -405,6 +637,8 @@ def log_with_context(message: str, level: str = "info", **kwargs):
     Args:
         message (str): The log message to record
         level (str): Log level (debug, info, warning, error, critical)
+        correlation_id (str, optional): Correlation ID of the request, if the caller
+            already has it; otherwise it is read from the request context
         **kwargs: Additional context data to include in the log
         
     Log Levels:
@@ -446,37 +680,28 @@ def log_with_context(message: str, level: str = "info", **kwargs):
         - Correlate logs with database metrics
         - Identify database bottlenecks
     """
-    # Get the current correlation ID for request correlation
-    correlation_id = get_correlation_id()
+    # Resolve the level once (unknown levels default to info) and bail out
+    # before building the payload if it is filtered out
+    level_no = _LEVEL_MAP.get(level, logging.INFO)
+    if not logger.isEnabledFor(level_no):
+        return
     
     # Build the complete log data structure
-    # This includes the correlation ID and all additional context
+    # Service attribution (and the correlation ID, unless passed in) is added
+    # by _RequestContextFilter, so only per-call context is built here
     # Database-specific context helps with troubleshooting and monitoring
     log_data = {
-        "correlation_id": correlation_id,    # Links log to specific request
         "log_message": message,              # The actual log message
-        "service": "data-store",            # Service attribution
-        "service_type": "database_service", # Service type for categorization
         "timestamp": time.time(),           # Unix timestamp for correlation
         **kwargs                            # Additional context data
     }
+    if correlation_id is not None:
+        log_data["correlation_id"] = correlation_id  # Links log to specific request
     
     # Log at the appropriate level with structured data
     # Each level provides different visibility in production environments
     # Database operations are logged at appropriate levels for monitoring
-    if level == "debug":
-        logger.debug(message, extra=log_data)
-    elif level == "info":
-        logger.info(message, extra=log_data)
-    elif level == "warning":
-        logger.warning(message, extra=log_data)
-    elif level == "error":
-        logger.error(message, extra=log_data)
-    elif level == "critical":
-        logger.critical(message, extra=log_data)
-    else:
-        # Default to info level for unknown levels
-        logger.info(message, extra=log_data)
+    logger.log(level_no, message, extra=log_data)
 
 def create_health_metrics():
     """
@@ -537,7 +762,158 @@ def create_health_metrics():
     
     return health_check_counter, health_check_duration
 
-def track_db_operation(operation: str, table: str, **attributes):
+@functools.lru_cache(maxsize=256)
+def _db_attrs(operation: str, table: str) -> dict:
+    return {
+        **_BASE_ATTRS,                    # Service attribution
+        "operation": operation,           # Operation type (insert, select, update, delete)
+        "table": table,                   # Database table name
+    }
+
+@functools.lru_cache(maxsize=256)
+def _db_result_attrs(operation: str, table: str, success: bool) -> dict:
+    return {**_db_attrs(operation, table), "success": success}  # Whether operation succeeded
+
+class DBOperationTracker:
+    """
+    Context manager for tracking database operations with comprehensive observability.
+    
+    This class provides automatic timing, metrics collection, and span management
+    for database operations. It ensures that all database operations are properly
+    monitored regardless of success or failure.
+    
+    Attributes:
+        span: OpenTelemetry span for the database operation
+        operation: Type of database operation being tracked
+        table: Database table being operated on
+        correlation_id: Correlation ID of the request, reused for the tracker's logs
+        start_time: When the operation started (set in __enter__)
+    """
+    
+    def __init__(self, span, operation, table, correlation_id):
+        """
+        Initialize the database operation tracker.
+        
+        Args:
+            span: OpenTelemetry span for the operation
+            operation: Type of database operation
+            table: Database table name
+            correlation_id: Correlation ID of the request performing the operation
+        """
+        self.span = span
+        self.operation = operation
+        self.table = table
+        self.correlation_id = correlation_id
+        self.start_time = None
+        
+    def __enter__(self):
+        """
+        Enter the database operation context.
+        
+        Records the start time and returns self for attribute access.
+        
+        Returns:
+            self: The tracker instance for attribute access
+        """
+        # Monotonic clock, so durations are unaffected by wall-clock adjustments
+        self.start_time = time.perf_counter()
+        return self
+        
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """
+        Exit the database operation context.
+        
+        Automatically records metrics, sets span attributes, and ends the span.
+        This method is called regardless of whether the operation succeeded or failed.
+        
+        Args:
+            exc_type: Exception type if an exception occurred
+            exc_val: Exception value if an exception occurred
+            exc_tb: Exception traceback if an exception occurred
+        """
+        # Calculate operation duration
+        duration = time.perf_counter() - self.start_time
+        
+        # Record operation count metric
+        # This tracks operation volume and success rates by operation type and table
+        db_operation_counter.add(1, _db_result_attrs(self.operation, self.table, exc_type is None))
+        
+        # Record operation duration metric
+        # This provides performance analysis and helps identify slow operations
+        db_operation_duration.record(duration, _db_attrs(self.operation, self.table))
+        
+        # Set span attributes for debugging and monitoring
+        # These attributes provide context for tracing and analysis
+        # (skipped entirely when the span was sampled out)
+        recording = self.span.is_recording()
+        if recording:
+            span_attrs = {
+                "duration": duration,             # Operation duration
+                "success": exc_type is None,      # Success status
+                "table": self.table,              # Table name
+                "operation_type": self.operation, # Operation type
+            }
+        
+        # If an exception occurred, capture error details
+        if exc_type:
+            if recording:
+                span_attrs["error"] = str(exc_val)              # Error message
+                span_attrs["error_type"] = exc_type.__name__    # Error type
+                self.span.set_attributes(span_attrs)
+                
+                # Record a real exception event and mark the span as failed so
+                # trace backends surface it as an error
+                self.span.record_exception(exc_val)
+                self.span.set_status(Status(StatusCode.ERROR, str(exc_val)))
+            
+            # Log the error with context for debugging
+            log_with_context(
+                f"Database operation failed: {self.operation} on {self.table}",
+                level="error",
+                correlation_id=self.correlation_id,
+                operation=self.operation,
+                table=self.table,
+                error=str(exc_val),
+                duration=duration
+            )
+        else:
+            if recording:
+                self.span.set_attributes(span_attrs)
+            
+            # Log successful operation for monitoring
+            log_with_context(
+                f"Database operation completed: {self.operation} on {self.table}",
+                level="debug",
+                correlation_id=self.correlation_id,
+                operation=self.operation,
+                table=self.table,
+                duration=duration
+            )
+        
+        # End the span to complete the trace
+        # This ensures the span is properly exported to the collector
+        self.span.end()
+
+class _NoopTracker:
+    """
+    Stand-in for DBOperationTracker used when observability is disabled.
+    
+    Exposes the same ``span`` attribute (a non-recording span) so callers can
+    keep calling ``db_tracker.span.set_attribute(...)`` unconditionally.
+    """
+    
+    span = trace.INVALID_SPAN
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        return False
+
+# Shared no-op tracker instance; it holds no per-operation state
+_NOOP = _NoopTracker()
+
+def track_db_operation(operation: str, table: str, correlation_id: Optional[str] = None, **attributes):
     """
     Track database operation with comprehensive metrics and tracing.
     
@@ -558,6 +934,8 @@ def track_db_operation(operation: str, table: str, **attributes):
     Args:
         operation (str): Type of database operation (insert, select, update, delete)
         table (str): Database table name for operation attribution
+        correlation_id (str, optional): Correlation ID of the request, if the caller
+            already has it; otherwise it is read once from the request context
         **attributes: Additional attributes to include in metrics and spans
         
     Returns:
@@ -593,126 +971,18 @@ def track_db_operation(operation: str, table: str, **attributes):
         - Metrics: database_operations_total{operation="insert", table="documentmetadata", success="true"}
         - Duration: database_operation_duration_seconds{operation="insert", table="documentmetadata"}
     """
-    # Get the current correlation ID for request correlation
-    correlation_id = get_correlation_id()
+    if not _OBS_ENABLED:
+        return _NOOP
+    
+    # Read the correlation ID once; the span and the tracker's logs share it
+    if correlation_id is None:
+        correlation_id = get_correlation_id()
     
     # Create span for database operation
     # This span represents the database operation and includes all relevant context
-    span = create_span(f"db_{operation}", "database_operation", table=table, **attributes)
-    
-    # Create context manager for timing and metrics collection
-    # This ensures metrics and spans are properly recorded even if exceptions occur
-    class DBOperationTracker:
-        """
-        Context manager for tracking database operations with comprehensive observability.
-        
-        This class provides automatic timing, metrics collection, and span management
-        for database operations. It ensures that all database operations are properly
-        monitored regardless of success or failure.
-        
-        Attributes:
-            span: OpenTelemetry span for the database operation
-            operation: Type of database operation being tracked
-            table: Database table being operated on
-            start_time: When the operation started (set in __enter__)
-        """
-        
-        def __init__(self, span, operation, table):
-            """
-            Initialize the database operation tracker.
-            
-            Args:
-                span: OpenTelemetry span for the operation
-                operation: Type of database operation
-                table: Database table name
-            """
-            self.span = span
-            self.operation = operation
-            self.table = table
-            self.start_time = None
-            
-        def __enter__(self):
-            """
-            Enter the database operation context.
-            
-            Records the start time and returns self for attribute access.
-            
-            Returns:
-                self: The tracker instance for attribute access
-            """
-            self.start_time = time.time()
-            return self
-            
-        def __exit__(self, exc_type, exc_val, exc_tb):
-            """
-            Exit the database operation context.
-            
-            Automatically records metrics, sets span attributes, and ends the span.
-            This method is called regardless of whether the operation succeeded or failed.
-            
-            Args:
-                exc_type: Exception type if an exception occurred
-                exc_val: Exception value if an exception occurred
-                exc_tb: Exception traceback if an exception occurred
-            """
-            # Calculate operation duration
-            duration = time.time() - self.start_time
-            
-            # Record operation count metric
-            # This tracks operation volume and success rates by operation type and table
-            db_operation_counter.add(1, {
-                "operation": operation,           # Operation type (insert, select, update, delete)
-                "table": table,                   # Database table name
-                "success": exc_type is None,      # Whether operation succeeded
-                "correlation_id": correlation_id, # Links to specific request
-                "service": "data-store",         # Service attribution
-                "service_type": "database_service" # Service type for monitoring
-            })
-            
-            # Record operation duration metric
-            # This provides performance analysis and helps identify slow operations
-            db_operation_duration.record(duration, {
-                "operation": operation,           # Operation type for performance analysis
-                "table": table,                   # Table for table-specific performance
-                "correlation_id": correlation_id, # Request correlation
-                "service": "data-store",         # Service attribution
-                "service_type": "database_service" # Service type for monitoring
-            })
-            
-            # Set span attributes for debugging and monitoring
-            # These attributes provide context for tracing and analysis
-            self.span.set_attribute("duration", duration)           # Operation duration
-            self.span.set_attribute("success", exc_type is None)    # Success status
-            self.span.set_attribute("table", table)                 # Table name
-            self.span.set_attribute("operation_type", operation)    # Operation type
-            
-            # If an exception occurred, capture error details
-            if exc_type:
-                self.span.set_attribute("error", str(exc_val))      # Error message
-                self.span.set_attribute("error_type", exc_type.__name__)  # Error type
-                
-                # Log the error with context for debugging
-                log_with_context(
-                    f"Database operation failed: {operation} on {table}",
-                    level="error",
-                    operation=operation,
-                    table=table,
-                    error=str(exc_val),
-                    duration=duration
-                )
-            else:
-                # Log successful operation for monitoring
-                log_with_context(
-                    f"Database operation completed: {operation} on {table}",
-                    level="debug",
-                    operation=operation,
-                    table=table,
-                    duration=duration
-                )
-            
-            # End the span to complete the trace
-            # This ensures the span is properly exported to the collector
-            self.span.end()
+    span = create_span(
+        f"db_{operation}", "database_operation", correlation_id=correlation_id, table=table, **attributes
+    )
     
     # Return the context manager for use in with statements
-    return DBOperationTracker(span, operation, table)
+    return DBOperationTracker(span, operation, table, correlation_id)
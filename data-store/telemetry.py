@@ -14,7 +14,7 @@ Key Components:
 - Automatic Instrumentation: Instruments FastAPI and SQLAlchemy for database observability
 
 Configuration:
-- OTLP gRPC export to otel-collector:4317
+- OTLP gRPC export to otel-collector:4317 (gzip-compressed)
 - Batch processing for performance optimization
 - Service attribution with name, version, and environment
 - Correlation ID context management for request tracing
@@ -23,8 +23,8 @@ Configuration:
 Usage:
     from telemetry import init_observability, get_correlation_id
     
-    # Initialize at startup
-    init_observability()
+    # Initialize at startup, once the FastAPI app exists
+    init_observability(app)
     
     # Use correlation ID in database operations
     correlation_id = get_correlation_id()
@@ -38,13 +38,15 @@ Database Observability Features:
 """
 
 import os
-import uuid
-from contextvars import ContextVar
+import re
+from contextvars import ContextVar, Token
+from typing import Optional
 from opentelemetry import trace
 from opentelemetry import metrics
 
 # Core OpenTelemetry SDK components for tracing
 from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
 from opentelemetry.sdk.trace.export import (
     BatchSpanProcessor,  # Batches spans for efficient export
 )
@@ -54,6 +56,7 @@ from opentelemetry.sdk.metrics.export import (
     PeriodicExportingMetricReader  # Exports metrics at regular intervals
 )
 # OTLP exporters for sending data to the collector
+from grpc import Compression
 from opentelemetry.exporter.otlp.proto.grpc.metric_exporter import OTLPMetricExporter
 from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
 
@@ -64,6 +67,35 @@ from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
 # SQLAlchemy instrumentation for database operation visibility
 from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
 
+# Collector endpoint used when OTEL_EXPORTER_OTLP_ENDPOINT is not set
+DEFAULT_OTLP_ENDPOINT = "http://otel-collector:4317"
+
+# Service metadata attached to ALL telemetry data (traces, metrics, logs)
+RESOURCE_ATTRIBUTES = {
+    "service.name": "data-store",           # Service identifier
+    "service.version": "1.0.0",             # Version for tracking deployments
+    "deployment.environment": os.getenv("ENVIRONMENT", "development"),  # Environment context
+    "service.type": "database_service",     # Indicates this is a database service
+    "database.type": "postgresql"          # Database technology for monitoring
+}
+
+# Endpoints that get no request spans. The instrumentation treats each
+# comma-separated entry as a regex searched anywhere in the full request URL,
+# so the patterns are anchored to the end of the probe paths; a bare "health"
+# would also drop the spans of /clients/healthcorp/documents/...
+TRACING_EXCLUDED_URLS = "/health$,/readyz$,/livez$"
+
+# Fraction of new traces to sample (head-based); child spans follow their parent's decision.
+# Read from the standard OTEL_TRACES_SAMPLER_ARG, with OTEL_TRACES_SAMPLER_RATIO
+# still accepted
+TRACE_SAMPLE_RATIO = float(
+    os.getenv("OTEL_TRACES_SAMPLER_ARG", os.getenv("OTEL_TRACES_SAMPLER_RATIO", "0.1"))
+)
+
+# W3C trace context header: version-traceid-parentid-flags, lowercase hex
+_TRACEPARENT_RE = re.compile(rb"[0-9a-f]{2}-([0-9a-f]{32})-[0-9a-f]{16}-[0-9a-f]{2}")
+_INVALID_TRACE_ID = b"0" * 32
+
 # Context variable for correlation ID management across async operations
 # This allows us to track request flow through the entire system, including database operations
 correlation_id: ContextVar[str] = ContextVar("correlation_id", default="")
@@ -95,7 +127,7 @@ def get_correlation_id() -> str:
     """
     return correlation_id.get()
 
-def set_correlation_id(corr_id: str) -> None:
+def set_correlation_id(corr_id: str) -> Token:
     """
     Set the current correlation ID in the context.
     
@@ -106,23 +138,37 @@ def set_correlation_id(corr_id: str) -> None:
     Args:
         corr_id (str): The correlation ID to set
         
+    Returns:
+        Token: Pass to reset_correlation_id() once the request is finished
+        
     Example:
-        >>> set_correlation_id("req-123-abc")
+        >>> token = set_correlation_id("req-123-abc")
         >>> # Now all database operations can access this ID for correlation
+        >>> reset_correlation_id(token)
         
     Database Context:
         The correlation ID is automatically propagated to SQLAlchemy operations
         through the OpenTelemetry instrumentation, enabling end-to-end tracing
         of database performance and operations.
     """
-    correlation_id.set(corr_id)
+    return correlation_id.set(corr_id)
+
+def reset_correlation_id(token: Token) -> None:
+    """
+    Restore the correlation ID that was current before set_correlation_id().
+    
+    Args:
+        token (Token): The token returned by set_correlation_id()
+    """
+    correlation_id.reset(token)
 
 def generate_correlation_id() -> str:
     """
     Generate a new unique correlation ID.
     
-    Creates a UUID4-based correlation ID that is guaranteed to be unique
-    across the entire system. This is used to track individual requests
+    Creates a random 128-bit correlation ID rendered as 32 hex characters,
+    the same shape as a W3C trace ID, so generated IDs and IDs taken from an
+    inbound traceparent look alike. This is used to track individual requests
     from start to finish, including all database interactions.
     
     Returns:
@@ -130,7 +176,7 @@ def generate_correlation_id() -> str:
         
     Example:
         >>> new_id = generate_correlation_id()
-        >>> # Result: "550e8400-e29b-41d4-a716-446655440000"
+        >>> # Result: "3f2a9c41d07be8150c6e2b9d4a7f1e53"
         
     Database Tracing:
         Each correlation ID enables engineers to trace:
@@ -140,9 +186,34 @@ def generate_correlation_id() -> str:
         - What data was accessed or modified
         - Any database errors or performance issues
     """
-    return str(uuid.uuid4())
+    return os.urandom(16).hex()
+
+def correlation_id_from_traceparent(traceparent: Optional[bytes]) -> Optional[str]:
+    """
+    Derive a correlation ID from an inbound W3C ``traceparent`` header.
+    
+    Using the trace ID as the correlation ID means logs and spans for the same
+    request share one identifier across services.
+    
+    Args:
+        traceparent (bytes, optional): Raw header value from the ASGI scope
+        
+    Returns:
+        str: The 32-hex-character trace ID, or None if the header is missing
+        or malformed (callers then fall back to generate_correlation_id())
+        
+    Example:
+        >>> correlation_id_from_traceparent(b"00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01")
+        >>> # Result: "4bf92f3577b34da6a3ce929d0e0e4736"
+    """
+    if not traceparent:
+        return None
+    match = _TRACEPARENT_RE.fullmatch(traceparent)
+    if match is None or match.group(1) == _INVALID_TRACE_ID:
+        return None
+    return match.group(1).decode("ascii")
 
-def init_observability():
+def init_observability(app):
     """
     Initialize OpenTelemetry observability for the Data Store service.
     
@@ -157,13 +228,17 @@ def init_observability():
     
     Configuration Details:
     - Tracing: Uses BatchSpanProcessor for efficient span export
-    - Metrics: Uses PeriodicExportingMetricReader with 5-second intervals
+    - Metrics: Uses PeriodicExportingMetricReader with 10-second intervals
     - Export: Sends data to otel-collector:4317 via gRPC
     - Resource: Adds service name, version, and environment metadata
     - SQLAlchemy: Automatic instrumentation for database operation visibility
     
     Environment Variables:
     - OTEL_EXPORTER_OTLP_ENDPOINT: Collector endpoint (default: otel-collector:4317)
+    - OTEL_TRACES_SAMPLER_ARG (or OTEL_TRACES_SAMPLER_RATIO): Fraction of new
+      traces sampled (default: 0.1)
+    - OTEL_BSP_MAX_QUEUE_SIZE, OTEL_BSP_SCHEDULE_DELAY, OTEL_BSP_MAX_EXPORT_BATCH_SIZE,
+      OTEL_BSP_EXPORT_TIMEOUT: Span batching (defaults: 4096, 1000 ms, 512, 10000 ms)
     - ENVIRONMENT: Deployment environment (default: development)
     
     Database Observability Features:
@@ -173,11 +248,15 @@ def init_observability():
     - Query parameter sanitization for security
     - Performance bottleneck identification in database operations
     
+    Args:
+        app: The FastAPI application to instrument. Health and probe endpoints
+            (/health, /readyz, /livez) are excluded from request tracing.
+    
     Note: This function should be called once at service startup, before
     any database operations or requests are processed.
     
     Example:
-        >>> init_observability()
+        >>> init_observability(app)
         >>> # Now all FastAPI requests and SQLAlchemy operations are automatically instrumented
         
     Database Tracing Example:
@@ -191,30 +270,42 @@ def init_observability():
     # Create resource with service information for attribution
     # This metadata is attached to ALL telemetry data (traces, metrics, logs)
     # making it easy to identify which service generated what data
-    resource = Resource.create({
-        "service.name": "data-store",           # Service identifier
-        "service.version": "1.0.0",             # Version for tracking deployments
-        "deployment.environment": os.getenv("ENVIRONMENT", "development"),  # Environment context
-        "service.type": "database_service",     # Indicates this is a database service
-        "database.type": "postgresql"          # Database technology for monitoring
-    })
+    resource = Resource.create(RESOURCE_ATTRIBUTES)
+    
+    # Read the collector endpoint once so traces and metrics always go to the same place
+    endpoint = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", DEFAULT_OTLP_ENDPOINT)
 
     # Initialize distributed tracing infrastructure
     # TracerProvider is the main entry point for trace generation
     # In the data-store service, this traces all database operations
-    trace_provider = TracerProvider(resource=resource)
+    # Sampling is decided once at the root: a sampled request keeps all of its
+    # spans (including DB spans), an unsampled one records none of them
+    trace_provider = TracerProvider(
+        resource=resource,
+        sampler=ParentBased(TraceIdRatioBased(TRACE_SAMPLE_RATIO))
+    )
     
     # Configure OTLP exporter for sending traces to the collector
     # The collector acts as a central hub for all observability data
     # Database operation traces are sent here for analysis
+    # Payloads are gzip-compressed; SQL spans carry long, repetitive strings
     otlp_exporter = OTLPSpanExporter(
-        endpoint=os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://otel-collector:4317")
+        endpoint=endpoint,
+        compression=Compression.Gzip
     )
     
     # BatchSpanProcessor batches spans before sending to improve performance
     # This is especially important for database operations which can generate
-    # many spans in rapid succession
-    processor = BatchSpanProcessor(otlp_exporter)
+    # many spans in rapid succession. The queue is sized above the default so
+    # bursts of DB spans are buffered rather than dropped between exports, and
+    # exports run often with a short timeout so a slow collector fails fast
+    processor = BatchSpanProcessor(
+        otlp_exporter,
+        max_queue_size=int(os.getenv("OTEL_BSP_MAX_QUEUE_SIZE", "4096")),                # Spans buffered before new ones are dropped
+        schedule_delay_millis=int(os.getenv("OTEL_BSP_SCHEDULE_DELAY", "1000")),         # Export at least every second
+        max_export_batch_size=int(os.getenv("OTEL_BSP_MAX_EXPORT_BATCH_SIZE", "512")),   # Spans sent per export call
+        export_timeout_millis=int(os.getenv("OTEL_BSP_EXPORT_TIMEOUT", "10000"))         # Give up on an export after 10 seconds
+    )
     trace_provider.add_span_processor(processor)
     
     # Set the global trace provider so all instrumentation can use it
@@ -226,9 +317,10 @@ def init_observability():
     # Database-specific metrics are created here for performance monitoring
     metric_reader = PeriodicExportingMetricReader(
         OTLPMetricExporter(
-            endpoint=os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://otel-collector:4317")
+            endpoint=endpoint,
+            compression=Compression.Gzip
         ), 
-        export_interval_millis=5000  # Export metrics every 5 seconds
+        export_interval_millis=10_000  # Export metrics every 10 seconds
     )
     
     # Create and set the global meter provider
@@ -239,7 +331,10 @@ def init_observability():
     # Enable automatic instrumentation for zero-code observability
     # FastAPIInstrumentor: Automatically traces all HTTP requests, adds timing, etc.
     # SQLAlchemyInstrumentor: Traces all database operations with detailed context
-    FastAPIInstrumentor().instrument()
+    # The app is instrumented directly (rather than patching the FastAPI class
+    # globally) so probe endpoints can be excluded: they are the bulk of the
+    # traffic and their spans carry no useful information
+    FastAPIInstrumentor.instrument_app(app, excluded_urls=TRACING_EXCLUDED_URLS)
     
     # SQLAlchemy instrumentation provides comprehensive database observability:
     # - Tracks all SQL queries with timing and parameters
@@ -251,7 +346,7 @@ def init_observability():
 
     print("✅ OpenTelemetry observability initialized successfully for Data Store!")
     print("   - Distributed tracing enabled with correlation ID support")
-    print("   - Metrics collection active with 5-second export intervals")
+    print("   - Metrics collection active with 10-second export intervals")
     print("   - Automatic instrumentation for FastAPI and SQLAlchemy")
     print("   - Service attribution: data-store v1.0.0 (development)")
     print("   - Database observability: PostgreSQL query tracing enabled")
@@ -0,0 +1,30 @@
+"""
+Tests for the data-store structured logging pipeline.
+"""
+
+import io
+import logging
+
+import orjson
+
+from observability import OrjsonFormatter, enable_queue_logging
+
+
+def test_queued_exception_keeps_traceback_in_exc_info(monkeypatch):
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(OrjsonFormatter())
+    monkeypatch.setattr(logging.getLogger(), "handlers", [handler])
+
+    listener = enable_queue_logging()
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logging.getLogger("test_queue").exception("Write failed for %s", "doc-1")
+    # Stopping the listener drains the queue
+    listener.stop()
+
+    payload = orjson.loads(stream.getvalue())
+    assert payload["msg"] == "Write failed for doc-1"
+    assert payload["exc_info"].startswith("Traceback")
+    assert "ValueError: boom" in payload["exc_info"]
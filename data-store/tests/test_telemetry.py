@@ -0,0 +1,58 @@
+"""
+Tests for the data-store tracing configuration.
+"""
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace import SpanKind
+
+from telemetry import TRACING_EXCLUDED_URLS
+
+
+def _traced_client():
+    """Return a test client for an app instrumented like the data-store, and its span exporter."""
+    app = FastAPI()
+
+    @app.get("/health")
+    @app.get("/readyz")
+    @app.get("/livez")
+    async def probe():
+        return {"status": "healthy"}
+
+    @app.get("/clients/{client_id}/documents/{document_id}")
+    async def get_document(client_id: str, document_id: int):
+        return {"client_id": client_id, "id": document_id}
+
+    exporter = InMemorySpanExporter()
+    tracer_provider = TracerProvider()
+    tracer_provider.add_span_processor(SimpleSpanProcessor(exporter))
+    FastAPIInstrumentor.instrument_app(
+        app, excluded_urls=TRACING_EXCLUDED_URLS, tracer_provider=tracer_provider
+    )
+    return TestClient(app), exporter
+
+
+def _server_spans(exporter):
+    return [span for span in exporter.get_finished_spans() if span.kind == SpanKind.SERVER]
+
+
+def test_probe_endpoints_are_not_traced():
+    client, exporter = _traced_client()
+
+    for path in ("/health", "/readyz", "/livez"):
+        assert client.get(path).status_code == 200
+
+    assert _server_spans(exporter) == []
+
+
+def test_business_routes_containing_probe_names_are_traced():
+    client, exporter = _traced_client()
+
+    for path in ("/clients/health-x/documents/1", "/clients/alivez-01/documents/1"):
+        exporter.clear()
+        assert client.get(path).status_code == 200
+        assert len(_server_spans(exporter)) == 1, path
@@ -1,22 +1,27 @@
 import asyncio
+import itertools
 import logging
+import os
 import time
 from datetime import datetime
 from pathlib import Path
+from typing import Optional
 
+import aiofiles
 import httpx
 import magic
 from config import get_settings
-from fastapi import Depends, FastAPI, File, HTTPException, UploadFile, Request, Response
+from fastapi import FastAPI, File, HTTPException, UploadFile, Request
 from fastapi.responses import JSONResponse
+from opentelemetry.instrumentation.utils import suppress_http_instrumentation
 
 from telemetry import init_observability
 from observability import (
     ObservabilityMiddleware, 
-    log_request_metrics, 
     create_span, 
     log_with_context,
-    create_health_metrics
+    create_health_metrics,
+    OrjsonFormatter
 )
 
 app = FastAPI(title="Document API", version="1.0.0")
@@ -24,57 +29,99 @@ app = FastAPI(title="Document API", version="1.0.0")
 # Add observability middleware
 app.add_middleware(ObservabilityMiddleware)
 
-logging.basicConfig(level=logging.INFO)
+# Structured JSON log lines, serialized with orjson
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(OrjsonFormatter())
+logging.basicConfig(level=logging.INFO, handlers=[_log_handler])
 logger = logging.getLogger(__name__)
 
 UPLOADS_DIR = Path("/app/uploads")
 UPLOADS_DIR.mkdir(exist_ok=True)
 
+# Uploads are copied to disk 64 KB at a time; libmagic only needs the start
+# of a file to identify its type
+UPLOAD_CHUNK_SIZE = 1 << 16
+MIME_SNIFF_BYTES = 2048
+
+# Per-process upload sequence; combined with a nanosecond timestamp it keeps
+# stored filenames unique (uploaded files are kept, so they must never collide
+# across restarts, and the timestamp keeps them sortable)
+_UPLOAD_SEQ = itertools.count()
+
+# libmagic loads its database once here rather than on every upload
+# (python-magic serializes calls on a Magic instance with its own lock)
+MIME_DETECTOR = magic.Magic(mime=True)
+
+# Keys of the metadata payload sent to the data-store, as one span attribute
+# string (cheaper to record and export than a per-request list)
+_METADATA_KEYS = ",".join(
+    ("client_id", "filename", "file_size", "file_type", "content_type", "file_path", "summary")
+)
+
 # Create health metrics
 health_check_counter, health_check_duration = create_health_metrics()
 
-@app.middleware("http")
-async def add_process_time_header(request: Request, call_next):
-    """Middleware to add process time header and log metrics."""
-    start_time = time.time()
-    
-    # Process the request
-    response = await call_next(request)
-    
-    # Calculate duration
-    process_time = time.time() - start_time
-    response.headers["X-Process-Time"] = str(process_time)
-    
-    # Log metrics
-    log_request_metrics(request, response, process_time)
-    
-    return response
+# Health checks run on every probe tick; their metrics are only recorded when
+# HEALTH_METRICS=1
+HEALTH_METRICS_ENABLED = os.getenv("HEALTH_METRICS", "0") == "1"
+
+# Shared client for calls to the data-store, so connections are pooled and
+# kept alive across requests instead of being set up for every call
+HTTP_CLIENT: Optional[httpx.AsyncClient] = None
+
+# Caps concurrent document calls to the data-store so that upload bursts queue
+# here instead of saturating its connection pool and timing out together
+DATA_STORE_SEM = asyncio.Semaphore(int(os.getenv("DATA_STORE_CONCURRENCY", "32")))
+
+@app.on_event("startup")
+async def open_http_client():
+    """Create the shared data-store client."""
+    global HTTP_CLIENT
+    HTTP_CLIENT = httpx.AsyncClient(
+        base_url=get_settings().data_store_url,
+        timeout=httpx.Timeout(30.0),
+        limits=httpx.Limits(max_keepalive_connections=50, max_connections=100),
+    )
+
+@app.on_event("shutdown")
+async def close_http_client():
+    """Close the shared data-store client and its pooled connections."""
+    if HTTP_CLIENT is not None:
+        await HTTP_CLIENT.aclose()
+
+async def check_data_store() -> str:
+    """Probe the data-store's health endpoint and return its status."""
+    try:
+        # The probe runs on every health check, so it gets no client span
+        with suppress_http_instrumentation():
+            response = await HTTP_CLIENT.get("/health", timeout=5.0)
+        return "healthy" if response.status_code == 200 else "unhealthy"
+    except Exception:
+        return "unhealthy"
 
 @app.get("/health")
 async def health_check():
     """Enhanced health check endpoint with metrics and detailed status."""
-    start_time = time.time()
+    start_time = time.perf_counter()
     
     try:
+        # Start the data store connectivity check first so the network round
+        # trip overlaps with the local file system check
+        data_store_task = asyncio.create_task(check_data_store())
+        
         # Check file system
         fs_status = "healthy" if UPLOADS_DIR.exists() and UPLOADS_DIR.is_dir() else "unhealthy"
         
-        # Check data store connectivity
-        settings = get_settings()
-        data_store_status = "unknown"
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"{settings.data_store_url}/health", timeout=5.0)
-                data_store_status = "healthy" if response.status_code == 200 else "unhealthy"
-        except Exception:
-            data_store_status = "unhealthy"
+        # Wait for the data store check
+        data_store_status = await data_store_task
         
         # Overall health
         overall_status = "healthy" if fs_status == "healthy" and data_store_status == "healthy" else "degraded"
         
         # Record metrics
-        health_check_counter.add(1, {"status": overall_status})
-        health_check_duration.record(time.time() - start_time)
+        if HEALTH_METRICS_ENABLED:
+            health_check_counter.add(1, {"status": overall_status})
+            health_check_duration.record(time.perf_counter() - start_time)
         
         log_with_context(
             "Health check completed",
@@ -96,8 +143,9 @@ async def health_check():
         }
         
     except Exception as e:
-        health_check_counter.add(1, {"status": "unhealthy"})
-        health_check_duration.record(time.time() - start_time)
+        if HEALTH_METRICS_ENABLED:
+            health_check_counter.add(1, {"status": "unhealthy"})
+            health_check_duration.record(time.perf_counter() - start_time)
         
         log_with_context(
             f"Health check failed: {str(e)}",
@@ -148,91 +196,104 @@ async def summarise_document_using_llm(file_path):
 async def upload_document(
     client_id: str, 
     file: UploadFile = File(...), 
-    settings=Depends(get_settings),
     request: Request = None
 ):
     """Upload a document and store its metadata for a specific client with comprehensive tracing."""
     file_path = None
+    # The stored file is kept once its metadata is saved; any failure before
+    # that point removes it again
+    upload_complete = False
+    summary_task = None
     
     with create_span("upload_document", "document_upload", client_id=client_id, file_name=file.filename) as span:
         try:
             # Start file processing
-            with create_span("file_processing", "file_operations", client_id=client_id) as file_span:
-                content = await file.read()
-                file_size = len(content)
-                file_type = magic.from_buffer(content, mime=True)
-                
-                file_span.set_attribute("file_size", file_size)
-                file_span.set_attribute("file_type", file_type)
-                file_span.set_attribute("content_type", file.content_type)
-                
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                safe_filename = f"{client_id}_{timestamp}_{file.filename}"
-                file_path = UPLOADS_DIR / safe_filename
-                
-                with open(file_path, "wb") as f:
-                    f.write(content)
-                
-                file_span.set_attribute("file_path", str(file_path))
-                
-                log_with_context(
-                    "File processed successfully",
-                    level="info",
-                    client_id=client_id,
-                    file_name=file.filename,
-                    file_size=file_size,
-                    file_type=file_type
-                )
+            safe_filename = f"{client_id}_{time.time_ns():x}_{next(_UPLOAD_SEQ)}_{file.filename}"
+            file_path = UPLOADS_DIR / safe_filename
             
-            # Generate summary
-            summary = await summarise_document_using_llm(file_path)
+            # Stream the upload to disk in fixed-size chunks rather than
+            # reading it into memory, counting its size as we go and keeping
+            # only the first bytes for MIME detection. Writes go through
+            # aiofiles' thread pool so disk I/O doesn't block the event loop
+            file_size = 0
+            head = None
+            async with aiofiles.open(file_path, "wb") as f:
+                while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                    await f.write(chunk)
+                    file_size += len(chunk)
+                    if head is None:
+                        head = chunk[:MIME_SNIFF_BYTES]
             
-            # Store metadata
-            with create_span("store_metadata", "data_operation", client_id=client_id) as store_span:
-                metadata = {
-                    "client_id": client_id,
-                    "filename": file.filename,
+            # Start the (slow) summarisation as soon as the file is on disk and
+            # finish the local processing while it runs
+            summary_task = asyncio.create_task(summarise_document_using_llm(file_path))
+            
+            file_type = MIME_DETECTOR.from_buffer(head or b"")
+            
+            # Recorded as an event on the request span rather than a child span
+            # (the payload is only built when the span is being recorded)
+            if span.is_recording():
+                span.add_event("file_processing", {
                     "file_size": file_size,
                     "file_type": file_type,
                     "content_type": file.content_type,
-                    "file_path": str(file_path),
-                    "summary": summary,
-                }
+                    "file_path": str(file_path)
+                })
+            
+            log_with_context(
+                "File processed successfully",
+                level="info",
+                client_id=client_id,
+                file_name=file.filename,
+                file_size=file_size,
+                file_type=file_type
+            )
+            
+            # Wait for the summary
+            summary = await summary_task
+            
+            # Store metadata
+            metadata = {
+                "client_id": client_id,
+                "filename": file.filename,
+                "file_size": file_size,
+                "file_type": file_type,
+                "content_type": file.content_type,
+                "file_path": str(file_path),
+                "summary": summary,
+            }
+            
+            span.set_attribute("metadata_keys", _METADATA_KEYS)
+            
+            async with DATA_STORE_SEM:
+                response = await HTTP_CLIENT.post(
+                    f"/clients/{client_id}/documents",
+                    json=metadata,
+                )
+            
+            if response.status_code != 200:
+                span.add_event("store_metadata", {"store_success": False, "error_status": response.status_code})
                 
-                store_span.set_attribute("metadata_keys", list(metadata.keys()))
+                log_with_context(
+                    f"Failed to store metadata: {response.text}",
+                    level="error",
+                    client_id=client_id,
+                    status_code=response.status_code
+                )
                 
-                async with httpx.AsyncClient() as client:
-                    response = await client.post(
-                        f"{settings.data_store_url}/clients/{client_id}/documents",
-                        json=metadata,
-                        timeout=30.0,
-                    )
-                    
-                    if response.status_code != 200:
-                        store_span.set_attribute("store_success", False)
-                        store_span.set_attribute("error_status", response.status_code)
-                        
-                        log_with_context(
-                            f"Failed to store metadata: {response.text}",
-                            level="error",
-                            client_id=client_id,
-                            status_code=response.status_code
-                        )
-                        
-                        raise HTTPException(
-                            status_code=500, detail="Failed to store document metadata"
-                        )
-                    
-                    stored_metadata = response.json()
-                    store_span.set_attribute("store_success", True)
-                    store_span.set_attribute("document_id", stored_metadata["id"])
-                    
-                    log_with_context(
-                        "Metadata stored successfully",
-                        level="info",
-                        client_id=client_id,
-                        document_id=stored_metadata["id"]
-                    )
+                raise HTTPException(
+                    status_code=500, detail="Failed to store document metadata"
+                )
+            
+            stored_metadata = response.json()
+            span.add_event("store_metadata", {"store_success": True, "document_id": stored_metadata["id"]})
+            
+            log_with_context(
+                "Metadata stored successfully",
+                level="info",
+                client_id=client_id,
+                document_id=stored_metadata["id"]
+            )
             
             # Set span attributes for successful upload
             span.set_attribute("upload_success", True)
@@ -247,6 +308,8 @@ async def upload_document(
                 document_id=stored_metadata["id"]
             )
             
+            upload_complete = True
+            
             return JSONResponse(
                 status_code=200,
                 content={
@@ -284,10 +347,14 @@ async def upload_document(
             raise HTTPException(status_code=500, detail="Failed to upload document")
             
         finally:
-            if file_path and file_path.exists():
+            # Don't leave the summarisation running if the upload failed first
+            if summary_task is not None and not summary_task.done():
+                summary_task.cancel()
+            
+            if not upload_complete and file_path and file_path.exists():
                 file_path.unlink()
                 log_with_context(
-                    "Temporary file cleaned up",
+                    "Partial upload cleaned up",
                     level="debug",
                     file_path=str(file_path)
                 )
@@ -295,62 +362,56 @@ async def upload_document(
 @app.get("/clients/{client_id}/documents/{document_id}")
 async def retrieve_document_metadata(
     client_id: str, 
-    document_id: int, 
-    settings=Depends(get_settings)
+    document_id: int
 ):
     """Retrieve document metadata by client ID and document ID with tracing."""
     with create_span("retrieve_document", "document_retrieval", client_id=client_id, document_id=document_id) as span:
         try:
-            with create_span("fetch_metadata", "data_operation", client_id=client_id) as fetch_span:
-                async with httpx.AsyncClient() as client:
-                    response = await client.get(
-                        f"{settings.data_store_url}/clients/{client_id}/documents/{document_id}",
-                        timeout=30.0,
-                    )
-                    
-                    if response.status_code == 404:
-                        fetch_span.set_attribute("fetch_success", False)
-                        fetch_span.set_attribute("error_type", "not_found")
-                        
-                        log_with_context(
-                            "Document not found",
-                            level="warning",
-                            client_id=client_id,
-                            document_id=document_id
-                        )
-                        
-                        raise HTTPException(status_code=404, detail="Document not found")
-                        
-                    elif response.status_code != 200:
-                        fetch_span.set_attribute("fetch_success", False)
-                        fetch_span.set_attribute("error_status", response.status_code)
-                        
-                        log_with_context(
-                            f"Failed to retrieve metadata: {response.text}",
-                            level="error",
-                            client_id=client_id,
-                            document_id=document_id,
-                            status_code=response.status_code
-                        )
-                        
-                        raise HTTPException(
-                            status_code=500, detail="Failed to retrieve document metadata"
-                        )
-                    
-                    metadata = response.json()
-                    fetch_span.set_attribute("fetch_success", True)
-                    fetch_span.set_attribute("metadata_keys", list(metadata.keys()))
-                    
-                    log_with_context(
-                        "Metadata retrieved successfully",
-                        level="info",
-                        client_id=client_id,
-                        document_id=document_id
-                    )
+            async with DATA_STORE_SEM:
+                response = await HTTP_CLIENT.get(
+                    f"/clients/{client_id}/documents/{document_id}"
+                )
+            
+            if response.status_code == 404:
+                span.add_event("fetch_metadata", {"fetch_success": False, "error_type": "not_found"})
+                span.set_attribute("retrieval_success", False)
+                
+                log_with_context(
+                    "Document not found",
+                    level="warning",
+                    client_id=client_id,
+                    document_id=document_id
+                )
+                
+                raise HTTPException(status_code=404, detail="Document not found")
+                
+            elif response.status_code != 200:
+                span.add_event("fetch_metadata", {"fetch_success": False, "error_status": response.status_code})
+                
+                log_with_context(
+                    f"Failed to retrieve metadata: {response.text}",
+                    level="error",
+                    client_id=client_id,
+                    document_id=document_id,
+                    status_code=response.status_code
+                )
+                
+                raise HTTPException(
+                    status_code=500, detail="Failed to retrieve document metadata"
+                )
+            
+            metadata = response.json()
+            span.add_event("fetch_metadata", {"fetch_success": True})
+            
+            log_with_context(
+                "Metadata retrieved successfully",
+                level="info",
+                client_id=client_id,
+                document_id=document_id
+            )
             
             # Set span attributes for successful retrieval
             span.set_attribute("retrieval_success", True)
-            span.set_attribute("metadata_keys", list(metadata.keys()))
             
             return metadata
             
@@ -387,7 +448,7 @@ async def retrieve_document_metadata(
                 status_code=500, detail="Failed to retrieve document metadata"
             )
 
-init_observability()
+init_observability(app)
 
 if __name__ == "__main__":
     import uvicorn
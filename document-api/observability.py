@@ -40,14 +40,22 @@ Usage:
 """
 
 import time
+import functools
 import logging
 from typing import Callable
-from fastapi import Request, Response
+import orjson
+from starlette.datastructures import MutableHeaders
 from opentelemetry import trace, metrics
 from opentelemetry.trace import SpanKind
 from opentelemetry.sdk.trace import Tracer
 from opentelemetry.sdk.metrics import Meter
-from telemetry import get_correlation_id, set_correlation_id, generate_correlation_id
+from telemetry import (
+    get_correlation_id,
+    set_correlation_id,
+    reset_correlation_id,
+    generate_correlation_id,
+    correlation_id_from_traceparent
+)
 
 # Get the global tracer and meter instances for this service
 # These are configured in telemetry.py and provide the core observability infrastructure
@@ -81,10 +89,108 @@ error_counter = meter.create_counter(
     unit="1"  # Count of errors
 )
 
+# Counter for health check requests - tracks health check volume and success/failure rates
+# Returned by create_health_metrics()
+_HEALTH_COUNTER = meter.create_counter(
+    name="health_check_total",
+    description="Total number of health check requests with status breakdown",
+    unit="1"  # Count of health checks
+)
+
+# Histogram for health check duration - monitors health check performance
+# and identifies slow responses
+_HEALTH_HISTOGRAM = meter.create_histogram(
+    name="health_check_duration_seconds",
+    description="Health check response time in seconds for performance monitoring",
+    unit="s"  # Time in seconds
+)
+
+# Attributes shared by every request metric, built once
+_SERVICE_ATTR = {"service": "document-api"}
+
+# Header names as they appear (lower-cased) in the ASGI scope
+_USER_AGENT = b"user-agent"
+_TRACEPARENT = b"traceparent"
+_REQUEST_ID = b"x-request-id"
+_EMPTY = ()
+
+@functools.lru_cache(maxsize=1024)
+def _decode_ua(raw: bytes) -> str:
+    """
+    Decode a raw user-agent header for logging.
+    
+    Real traffic repeats a few hundred user agents, so decoded strings are
+    cached. latin-1 never fails and matches ASCII byte for byte; the value is
+    capped at 256 bytes so pathological headers stay bounded.
+    """
+    return raw[:256].decode("latin-1", "replace")
+
+# Longest inbound X-Request-ID accepted as a correlation ID
+_MAX_REQUEST_ID_LEN = 128
+
+# log_with_context level names -> logging levels
+_LEVEL_MAP = {
+    "debug": logging.DEBUG,
+    "info": logging.INFO,
+    "warning": logging.WARNING,
+    "error": logging.ERROR,
+    "critical": logging.CRITICAL,
+}
+
 # Create structured logger with consistent formatting
 # This logger will include correlation IDs and context in all log entries
 logger = logging.getLogger(__name__)
 
+class _RequestContextFilter(logging.Filter):
+    """
+    Attach the request context (correlation ID and service attribution) to
+    every record emitted through this module's logger.
+    
+    Doing this once in the logging pipeline means call sites don't rebuild
+    these keys in an ``extra`` dict for every message, and records dropped by
+    the level check never pay for them at all.
+    """
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        # Callers that already know the correlation ID can pass it via extra
+        if not hasattr(record, "correlation_id"):
+            record.correlation_id = get_correlation_id()
+        record.service = "document-api"
+        return True
+
+logger.addFilter(_RequestContextFilter())
+
+# Attributes every LogRecord has; anything else on a record came from extra=
+# or from _RequestContextFilter and is emitted as a structured field
+_RECORD_ATTRS = frozenset(logging.makeLogRecord({}).__dict__) | {"message", "asctime"}
+
+class OrjsonFormatter(logging.Formatter):
+    """
+    Format log records as single-line JSON using orjson.
+    
+    The output carries the message, level, logger name and creation time
+    (Unix seconds) plus every structured field attached to the record (the
+    ``extra`` payloads of ObservabilityMiddleware and log_with_context, and
+    the request context added by _RequestContextFilter). Values orjson
+    can't serialize natively are written with str().
+    """
+    
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "msg": record.getMessage(),
+            "level": record.levelname,
+            "logger": record.name,
+            "timestamp": record.created,
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                payload[key] = value
+        
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        
+        return orjson.dumps(payload, default=str).decode()
+
 class ObservabilityMiddleware:
     """
     Middleware for adding comprehensive observability to FastAPI requests.
@@ -93,14 +199,17 @@ class ObservabilityMiddleware:
     1. Generates a unique correlation ID for each request
     2. Injects this ID into the request context
     3. Logs request start with full context
-    4. Enables distributed tracing across all services
+    4. Adds the X-Process-Time and X-Correlation-ID response headers and
+       records request metrics
+    5. Enables distributed tracing across all services
     
     The correlation ID flows through the entire request lifecycle, allowing
     engineers to trace requests from the load balancer through all services
     to the database and back.
     
     Architecture:
-    - Generates UUID4 correlation ID for each request
+    - Uses the inbound traceparent trace ID or X-Request-ID as the
+      correlation ID, or generates a random one when neither is present
     - Sets correlation ID in async context for the request duration
     - Logs request start with method, path, client IP, and user agent
     - Preserves all existing FastAPI functionality
@@ -128,10 +237,12 @@ class ObservabilityMiddleware:
         Process each request through the observability middleware.
         
         This method is called for every HTTP request and:
-        1. Generates a unique correlation ID
+        1. Takes the correlation ID from the request headers or generates one
         2. Sets it in the async context
         3. Logs request start information
         4. Processes the request normally
+        5. Adds X-Process-Time and X-Correlation-ID to the response and
+           records request metrics
         
         Args:
             scope: ASGI scope containing request information
@@ -142,53 +253,156 @@ class ObservabilityMiddleware:
             This middleware only processes HTTP requests. Other ASGI
             protocols (WebSocket, etc.) are passed through unchanged.
         """
-        if scope["type"] == "http":
-            # Generate a unique correlation ID for this request
-            # This ID will be used throughout the entire request lifecycle
-            correlation_id = generate_correlation_id()
-            set_correlation_id(correlation_id)
-            
-            # Add correlation ID to scope for potential use by other middleware
-            # This allows other components to access the correlation ID
-            scope["correlation_id"] = correlation_id
-            
-            # Create a custom send function to capture response information
-            # This allows us to log request start when the response begins
-            async def custom_send(message):
-                if message["type"] == "http.response.start":
-                    # Extract client information for security and debugging
-                    client_ip = scope.get("client", ("unknown", 0))[0]
-                    
-                    # Extract user agent for client identification
-                    headers = dict(scope.get("headers", []))
-                    user_agent = headers.get(b"user-agent", b"").decode()
-                    
-                    # Log request start with comprehensive context
-                    # This provides immediate visibility into incoming requests
-                    logger.info(
-                        "Request started",
-                        extra={
-                            "correlation_id": correlation_id,
-                            "method": scope["method"],
-                            "path": scope["path"],
-                            "client_ip": client_ip,
-                            "user_agent": user_agent,
-                            "request_type": "http_start"
-                        }
-                    )
-                
-                # Forward the message to the original send function
-                await send(message)
-            
-            # Process the request through the wrapped application
-            # All subsequent operations will have access to the correlation ID
-            await self.app(scope, receive, custom_send)
-        else:
+        if scope["type"] != "http":
             # For non-HTTP requests (WebSocket, etc.), pass through unchanged
             # This ensures the middleware doesn't interfere with other protocols
             await self.app(scope, receive, send)
+            return
+        
+        # Read the headers we need in a single pass
+        user_agent = b""
+        traceparent = None
+        request_id = None
+        for name, value in scope.get("headers", _EMPTY):
+            if name == _USER_AGENT:
+                user_agent = value
+            elif name == _TRACEPARENT:
+                traceparent = value
+            elif name == _REQUEST_ID:
+                request_id = value
+        
+        # Continue the caller's correlation ID when there is one: the trace ID
+        # of an inbound traceparent, else an X-Request-ID set by a proxy or
+        # client. Otherwise generate a unique one for this request
+        # This ID will be used throughout the entire request lifecycle
+        correlation_id = correlation_id_from_traceparent(traceparent)
+        if correlation_id is None:
+            if request_id and len(request_id) <= _MAX_REQUEST_ID_LEN:
+                correlation_id = request_id.decode("latin-1")
+            else:
+                correlation_id = generate_correlation_id()
+        correlation_token = set_correlation_id(correlation_id)
+        
+        # Add correlation ID to scope for potential use by other middleware
+        # This allows other components to access the correlation ID
+        scope["correlation_id"] = correlation_id
+        
+        start_time = time.perf_counter()
+        
+        # Wrap send to capture the response status, add the response headers and
+        # log the request start when the response begins
+        wrapped_send = _ResponseStartSend(send, scope, start_time, user_agent)
+        
+        # Process the request through the wrapped application
+        # All subsequent operations will have access to the correlation ID
+        try:
+            await self.app(scope, receive, wrapped_send)
+        finally:
+            log_request_metrics(scope, wrapped_send.status_code, time.perf_counter() - start_time)
+            
+            # Restore the previous value so the request's ID doesn't leak
+            # into whatever runs next in this context
+            reset_correlation_id(correlation_token)
 
-def log_request_metrics(request: Request, response: Response, duration: float):
+class _ResponseStartSend:
+    """
+    ASGI send wrapper used by ObservabilityMiddleware for a single request.
+    
+    On ``http.response.start`` it records the status code, appends the
+    X-Process-Time and X-Correlation-ID headers and logs the request start;
+    every message is then forwarded to the server's send. A slotted instance
+    replaces the per-request closure (and its cell variables) that used to be
+    built inside ``__call__``.
+    """
+    
+    __slots__ = ("send", "scope", "start_time", "user_agent", "status_code")
+    
+    def __init__(self, send, scope: dict, start_time: float, user_agent: bytes):
+        self.send = send
+        self.scope = scope
+        self.start_time = start_time
+        self.user_agent = user_agent
+        self.status_code = 500  # Reported if the app fails before sending a response
+    
+    async def __call__(self, message):
+        if message["type"] == "http.response.start":
+            self.status_code = message["status"]
+            
+            # Expose the processing time and the correlation ID to clients;
+            # the latter lets a caller confirm which ID its request was
+            # logged and traced under
+            process_time = time.perf_counter() - self.start_time
+            headers = MutableHeaders(scope=message)
+            headers.append("X-Process-Time", str(process_time))
+            headers.append("X-Correlation-ID", self.scope["correlation_id"])
+            
+            # Log request start with comprehensive context
+            # This provides immediate visibility into incoming requests
+            # The payload is only built when INFO records are emitted
+            if logger.isEnabledFor(logging.INFO):
+                scope = self.scope
+                
+                # Extract client information for security and debugging
+                client = scope.get("client")
+                
+                logger.info(
+                    "Request started",
+                    extra={
+                        "method": scope["method"],
+                        "path": scope["path"],
+                        "client_ip": client[0] if client else "unknown",
+                        "user_agent": _decode_ua(self.user_agent),
+                        "request_type": "http_start"
+                    }
+                )
+        
+        # Forward the message to the original send function
+        await self.send(message)
+
+# Path label for requests that matched no route. Unmatched paths (typos,
+# scanners probing /.env, /wp-admin/...) are chosen by the client, so they
+# share one label instead of each creating a time series; the raw path is
+# still in the request logs
+_UNMATCHED_ROUTE = "<unmatched>"
+
+def _route_template(scope: dict) -> str:
+    """
+    Return the matched route template for a request (e.g. "/clients/{client_id}/documents/{document_id}").
+    
+    The router stores the matched route in the scope, so this is only
+    available once the request has been routed. Unmatched requests (404s)
+    all get the "<unmatched>" label.
+    """
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    return _UNMATCHED_ROUTE
+
+# Metric attribute dicts are memoized per label combination. The label space
+# (method x route template x status) is small, so repeat requests reuse the
+# same dict instead of building and hashing a new one.
+# The returned dicts are shared and must not be mutated.
+
+@functools.lru_cache(maxsize=2048)
+def _request_attrs(method: str, path: str) -> dict:
+    return {
+        **_SERVICE_ATTR,                    # Service attribution
+        "method": method,                   # HTTP method (GET, POST, PUT, etc.)
+        "path": path,                       # Route template (/health, /clients/{client_id}/upload-document, etc.)
+    }
+
+@functools.lru_cache(maxsize=2048)
+def _request_status_attrs(method: str, path: str, status_code: int) -> dict:
+    return {**_request_attrs(method, path), "status_code": str(status_code)}
+
+@functools.lru_cache(maxsize=2048)
+def _request_error_attrs(method: str, path: str, status_code: int) -> dict:
+    return {
+        **_request_status_attrs(method, path, status_code),
+        "error_category": "4xx" if status_code < 500 else "5xx"  # Error classification
+    }
+
+def log_request_metrics(scope: dict, status_code: int, duration: float):
     """
     Log comprehensive metrics for an HTTP request.
     
@@ -197,12 +411,16 @@ def log_request_metrics(request: Request, response: Response, duration: float):
     - Request duration for performance monitoring
     - Error tracking for 4xx and 5xx responses
     
-    All metrics include the correlation ID for request correlation and
-    the ability to trace specific requests through the metrics.
+    Metric attributes are limited to bounded values: the route template
+    (e.g. "/clients/{client_id}/upload-document") rather than the raw path, and no
+    per-request correlation ID, so the number of time series stays at
+    route × method × status. Correlation IDs are carried by spans and logs.
+    
+    Called by ObservabilityMiddleware once the request has been handled.
     
     Args:
-        request: FastAPI Request object containing request details
-        response: FastAPI Response object containing response details
+        scope: ASGI scope of the request
+        status_code: HTTP status code of the response
         duration: Request duration in seconds (float)
         
     Metrics Collected:
@@ -211,43 +429,24 @@ def log_request_metrics(request: Request, response: Response, duration: float):
         - http_errors_total: Count of error responses
         
     Example:
-        >>> log_request_metrics(request, response, 0.125)
+        >>> log_request_metrics(scope, 200, 0.125)
         >>> # Records: 1 request, 0.125s duration, error status if applicable
     """
-    # Get the correlation ID for this request
-    # This links all metrics to the specific request being processed
-    correlation_id = get_correlation_id()
+    method = scope["method"]
+    path = _route_template(scope)
     
     # Increment the total request counter
     # This tracks overall request volume and can be used for capacity planning
-    request_counter.add(1, {
-        "method": request.method,           # HTTP method (GET, POST, PUT, etc.)
-        "path": request.url.path,           # Request path (/health, /upload, etc.)
-        "status_code": str(response.status_code),  # Response status (200, 404, 500, etc.)
-        "correlation_id": correlation_id,   # Links metrics to specific requests
-        "service": "document-api"          # Service identifier for multi-service monitoring
-    })
+    request_counter.add(1, _request_status_attrs(method, path, status_code))
     
     # Record request duration in the histogram
     # This provides detailed performance analysis including percentiles
-    request_duration.record(duration, {
-        "method": request.method,           # HTTP method for method-specific performance
-        "path": request.url.path,           # Path for endpoint-specific performance
-        "correlation_id": correlation_id,   # Request correlation
-        "service": "document-api"          # Service attribution
-    })
+    request_duration.record(duration, _request_attrs(method, path))
     
     # Increment error counter for 4xx and 5xx status codes
     # This tracks error rates and helps identify problematic endpoints
-    if response.status_code >= 400:
-        error_counter.add(1, {
-            "method": request.method,           # HTTP method for error analysis
-            "path": request.url.path,           # Endpoint for error localization
-            "status_code": str(response.status_code),  # Specific error type
-            "correlation_id": correlation_id,   # Links errors to specific requests
-            "service": "document-api",         # Service attribution
-            "error_category": "4xx" if response.status_code < 500 else "5xx"  # Error classification
-        })
+    if status_code >= 400:
+        error_counter.add(1, _request_error_attrs(method, path, status_code))
 
 def create_span(name: str, operation: str, **attributes):
     """
@@ -279,7 +478,18 @@ def create_span(name: str, operation: str, **attributes):
         - file_size: Size of uploaded files for capacity monitoring
         - operation_type: Type of business operation being performed
         - external_service: Name of external service being called
+        
+    Note:
+        When the enclosing request trace was not sampled the span is returned
+        without attributes; it is non-recording and set_attribute/add_event
+        calls on it are no-ops.
     """
+    # The request's trace was sampled out, so this (ParentBased-sampled) span
+    # will not be recorded either; don't build its attributes
+    parent_context = trace.get_current_span().get_span_context()
+    if parent_context.is_valid and not parent_context.trace_flags.sampled:
+        return tracer.start_span(name=name, kind=SpanKind.INTERNAL)
+    
     # Get the current correlation ID to link this span to the request
     correlation_id = get_correlation_id()
     
@@ -336,49 +546,34 @@ def log_with_context(message: str, level: str = "info", **kwargs):
         
     Structured Output:
         {
+            "msg": "File uploaded successfully",
+            "level": "INFO",
+            "logger": "observability",
+            "timestamp": 1755676800.0,
             "correlation_id": "abc-123-def",
-            "log_message": "File uploaded successfully",
+            "service": "document-api",
             "client_id": "123",
             "file_size": 1024,
-            "file_type": "text/plain",
-            "timestamp": "2025-08-20T08:00:00Z",
-            "level": "info"
+            "file_type": "text/plain"
         }
     """
-    # Get the current correlation ID for request correlation
-    correlation_id = get_correlation_id()
-    
-    # Build the complete log data structure
-    # This includes the correlation ID and all additional context
-    log_data = {
-        "correlation_id": correlation_id,    # Links log to specific request
-        "log_message": message,              # The actual log message
-        "service": "document-api",          # Service attribution
-        "timestamp": time.time(),           # Unix timestamp for correlation
-        **kwargs                            # Additional context data
-    }
+    # Resolve the level once (unknown levels default to info) and bail out
+    # before building the payload if it is filtered out
+    level_no = _LEVEL_MAP.get(level, logging.INFO)
+    if not logger.isEnabledFor(level_no):
+        return
     
-    # Log at the appropriate level with structured data
-    # Each level provides different visibility in production environments
-    if level == "debug":
-        logger.debug(message, extra=log_data)
-    elif level == "info":
-        logger.info(message, extra=log_data)
-    elif level == "warning":
-        logger.warning(message, extra=log_data)
-    elif level == "error":
-        logger.error(message, extra=log_data)
-    elif level == "critical":
-        logger.critical(message, extra=log_data)
-    else:
-        # Default to info level for unknown levels
-        logger.info(message, extra=log_data)
+    # The correlation ID and service attribution are added by
+    # _RequestContextFilter, and the message and timestamp are already part
+    # of the LogRecord, so only the per-call context is passed along
+    logger.log(level_no, message, extra=kwargs)
 
 def create_health_metrics():
     """
-    Create specialized metrics for health check monitoring.
+    Return the specialized metrics for health check monitoring.
     
-    This function creates metrics specifically designed for monitoring
+    The instruments are created once at module import, so repeated calls
+    are cheap and return the same objects. They are designed for monitoring
     service health and availability. These metrics help identify:
     - Service availability and uptime
     - Health check performance and latency
@@ -403,20 +598,4 @@ def create_health_metrics():
         - health_check_total{status="healthy"}: Count of successful health checks
         - health_check_duration_seconds{status="healthy"}: Response time distribution
     """
-    # Counter for health check requests
-    # Tracks health check volume and success/failure rates
-    health_check_counter = meter.create_counter(
-        name="health_check_total",
-        description="Total number of health check requests with status breakdown",
-        unit="1"  # Count of health checks
-    )
-    
-    # Histogram for health check duration
-    # Monitors health check performance and identifies slow responses
-    health_check_duration = meter.create_histogram(
-        name="health_check_duration_seconds",
-        description="Health check response time in seconds for performance monitoring",
-        unit="s"  # Time in seconds
-    )
-    
-    return health_check_counter, health_check_duration
+    return _HEALTH_COUNTER, _HEALTH_HISTOGRAM
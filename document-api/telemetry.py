@@ -23,37 +23,33 @@ Usage:
     from telemetry import init_observability, get_correlation_id
     
     # Initialize at startup
-    init_observability()
+    init_observability(app)
     
     # Use correlation ID in request handling
     correlation_id = get_correlation_id()
 """
 
 import os
-import uuid
-from contextvars import ContextVar
+import re
+from contextvars import ContextVar, Token
+from typing import Optional
 from opentelemetry import trace
 from opentelemetry import metrics
+from opentelemetry.metrics import NoOpMeterProvider
 
-# Core OpenTelemetry SDK components for tracing
-from opentelemetry.sdk.trace import TracerProvider
-from opentelemetry.sdk.trace.export import (
-    BatchSpanProcessor,  # Batches spans for efficient export
-)
-# Core OpenTelemetry SDK components for metrics
-from opentelemetry.sdk.metrics import MeterProvider
-from opentelemetry.sdk.metrics.export import (
-    PeriodicExportingMetricReader  # Exports metrics at regular intervals
-)
-# OTLP exporters for sending data to the collector
-from opentelemetry.exporter.otlp.proto.grpc.metric_exporter import OTLPMetricExporter
-from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
-
-# Resource management for service attribution
-from opentelemetry.sdk.resources import Resource
-# Automatic instrumentation for popular frameworks
-from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
-from opentelemetry.instrumentation.httpx import HTTPXClientInstrumentor
+# The SDK, OTLP exporters (gRPC/protobuf) and instrumentors are imported inside
+# init_observability(): processes that only need the correlation ID helpers
+# don't pay for loading them
+
+# Endpoints that get no request spans. The instrumentation treats each
+# comma-separated entry as a regex searched anywhere in the full request URL,
+# so the pattern is anchored to the end of the probe path; a bare "health"
+# would also drop the spans of /clients/healthcorp/upload-document
+TRACING_EXCLUDED_URLS = "/health$"
+
+# W3C trace context header: version-traceid-parentid-flags, lowercase hex
+_TRACEPARENT_RE = re.compile(rb"[0-9a-f]{2}-([0-9a-f]{32})-[0-9a-f]{16}-[0-9a-f]{2}")
+_INVALID_TRACE_ID = b"0" * 32
 
 # Context variable for correlation ID management across async operations
 # This allows us to track request flow through the entire system
@@ -76,7 +72,7 @@ def get_correlation_id() -> str:
     """
     return correlation_id.get()
 
-def set_correlation_id(corr_id: str) -> None:
+def set_correlation_id(corr_id: str) -> Token:
     """
     Set the current correlation ID in the context.
     
@@ -87,30 +83,68 @@ def set_correlation_id(corr_id: str) -> None:
     Args:
         corr_id (str): The correlation ID to set
         
+    Returns:
+        Token: Pass to reset_correlation_id() once the request is finished
+        
     Example:
-        >>> set_correlation_id("req-123-abc")
+        >>> token = set_correlation_id("req-123-abc")
         >>> # Now all operations can access this ID
+        >>> reset_correlation_id(token)
     """
-    correlation_id.set(corr_id)
+    return correlation_id.set(corr_id)
+
+def reset_correlation_id(token: Token) -> None:
+    """
+    Restore the correlation ID that was current before set_correlation_id().
+    
+    Args:
+        token (Token): The token returned by set_correlation_id()
+    """
+    correlation_id.reset(token)
 
 def generate_correlation_id() -> str:
     """
     Generate a new unique correlation ID.
     
-    Creates a UUID4-based correlation ID that is guaranteed to be unique
-    across the entire system. This is used to track individual requests
-    from start to finish.
+    Creates a random 128-bit correlation ID rendered as 32 hex characters,
+    the same shape as a W3C trace ID. This is used to track individual
+    requests from start to finish.
     
     Returns:
         str: A new unique correlation ID
         
     Example:
         >>> new_id = generate_correlation_id()
-        >>> # Result: "550e8400-e29b-41d4-a716-446655440000"
+        >>> # Result: "3f2a9c41d07be8150c6e2b9d4a7f1e53"
+    """
+    return os.urandom(16).hex()
+
+def correlation_id_from_traceparent(traceparent: Optional[bytes]) -> Optional[str]:
+    """
+    Derive a correlation ID from an inbound W3C ``traceparent`` header.
+    
+    Using the trace ID as the correlation ID means logs and spans for the same
+    request share one identifier across services.
+    
+    Args:
+        traceparent (bytes, optional): Raw header value from the ASGI scope
+        
+    Returns:
+        str: The 32-hex-character trace ID, or None if the header is missing
+        or malformed (callers then fall back to generate_correlation_id())
+        
+    Example:
+        >>> correlation_id_from_traceparent(b"00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01")
+        >>> # Result: "4bf92f3577b34da6a3ce929d0e0e4736"
     """
-    return str(uuid.uuid4())
+    if not traceparent:
+        return None
+    match = _TRACEPARENT_RE.fullmatch(traceparent)
+    if match is None or match.group(1) == _INVALID_TRACE_ID:
+        return None
+    return match.group(1).decode("ascii")
 
-def init_observability():
+def init_observability(app):
     """
     Initialize OpenTelemetry observability for the Document API service.
     
@@ -124,21 +158,52 @@ def init_observability():
     
     Configuration Details:
     - Tracing: Uses BatchSpanProcessor for efficient span export
-    - Metrics: Uses PeriodicExportingMetricReader with 5-second intervals
+    - Metrics: Uses PeriodicExportingMetricReader with 30-second intervals and
+      delta temporality for counters and histograms
     - Export: Sends data to otel-collector:4317 via gRPC
     - Resource: Adds service name, version, and environment metadata
     
     Environment Variables:
     - OTEL_EXPORTER_OTLP_ENDPOINT: Collector endpoint (default: otel-collector:4317)
+    - OTEL_METRIC_EXPORT_INTERVAL: Metric export interval in ms (default: 30000)
+    - OTEL_BSP_MAX_QUEUE_SIZE, OTEL_BSP_SCHEDULE_DELAY, OTEL_BSP_MAX_EXPORT_BATCH_SIZE,
+      OTEL_BSP_EXPORT_TIMEOUT: Span batching (defaults: 10000, 2000 ms, 2048, 10000 ms)
     - ENVIRONMENT: Deployment environment (default: development)
     
+    Args:
+        app: The FastAPI application to instrument. Only its server spans are
+            recorded by the instrumentation; request metrics come from
+            ObservabilityMiddleware, so the instrumentor's own HTTP metrics
+            are disabled rather than recorded twice. The /health endpoint is
+            excluded from request tracing.
+    
     Note: This function should be called once at service startup, before
     any requests are processed.
     
     Example:
-        >>> init_observability()
+        >>> init_observability(app)
         >>> # Now all FastAPI requests and HTTPX calls are automatically instrumented
     """
+    # Core OpenTelemetry SDK components for tracing
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import (
+        BatchSpanProcessor,  # Batches spans for efficient export
+    )
+    # Core OpenTelemetry SDK components for metrics
+    from opentelemetry.sdk.metrics import MeterProvider, Counter, Histogram
+    from opentelemetry.sdk.metrics.export import (
+        AggregationTemporality,
+        PeriodicExportingMetricReader  # Exports metrics at regular intervals
+    )
+    # OTLP exporters for sending data to the collector
+    from opentelemetry.exporter.otlp.proto.grpc.metric_exporter import OTLPMetricExporter
+    from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+    
+    # Resource management for service attribution
+    from opentelemetry.sdk.resources import Resource
+    # Automatic instrumentation for popular frameworks
+    from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+    from opentelemetry.instrumentation.httpx import HTTPXClientInstrumentor
     
     # Create resource with service information for attribution
     # This metadata is attached to ALL telemetry data (traces, metrics, logs)
@@ -160,8 +225,17 @@ def init_observability():
     )
     
     # BatchSpanProcessor batches spans before sending to improve performance
-    # This reduces network overhead and collector load
-    processor = BatchSpanProcessor(otlp_exporter)
+    # This reduces network overhead and collector load. The queue and export
+    # batches are larger than the SDK defaults so bursts of upload spans are
+    # buffered rather than dropped and each export carries more spans, and the
+    # export timeout is short so a slow collector fails fast
+    processor = BatchSpanProcessor(
+        otlp_exporter,
+        max_queue_size=int(os.getenv("OTEL_BSP_MAX_QUEUE_SIZE", "10000")),               # Spans buffered before new ones are dropped
+        schedule_delay_millis=int(os.getenv("OTEL_BSP_SCHEDULE_DELAY", "2000")),         # Export at least every 2 seconds
+        max_export_batch_size=int(os.getenv("OTEL_BSP_MAX_EXPORT_BATCH_SIZE", "2048")),  # Spans sent per export call
+        export_timeout_millis=int(os.getenv("OTEL_BSP_EXPORT_TIMEOUT", "10000"))         # Give up on an export after 10 seconds
+    )
     trace_provider.add_span_processor(processor)
     
     # Set the global trace provider so all instrumentation can use it
@@ -171,9 +245,16 @@ def init_observability():
     # MeterProvider manages all metric instruments and their lifecycle
     metric_reader = PeriodicExportingMetricReader(
         OTLPMetricExporter(
-            endpoint=os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://otel-collector:4317")
+            endpoint=os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://otel-collector:4317"),
+            # Counters and histograms are exported as deltas: each export only
+            # carries what changed since the previous one, and idle series
+            # drop out of the payload
+            preferred_temporality={
+                Counter: AggregationTemporality.DELTA,
+                Histogram: AggregationTemporality.DELTA,
+            }
         ), 
-        export_interval_millis=5000  # Export metrics every 5 seconds
+        export_interval_millis=int(os.getenv("OTEL_METRIC_EXPORT_INTERVAL", "30000"))  # Export metrics every 30 seconds
     )
     
     # Create and set the global meter provider
@@ -183,12 +264,21 @@ def init_observability():
     # Enable automatic instrumentation for zero-code observability
     # FastAPIInstrumentor: Automatically traces all HTTP requests, adds timing, etc.
     # HTTPXClientInstrumentor: Traces all outgoing HTTP calls to other services
-    FastAPIInstrumentor().instrument()
+    # The app is instrumented directly rather than patching the FastAPI class
+    # globally. ObservabilityMiddleware already records http_requests_total and
+    # http_request_duration_seconds, so the instrumentor gets a no-op meter
+    # provider and only produces the server spans. Health probes are excluded:
+    # they arrive every few seconds and their spans carry no useful information
+    FastAPIInstrumentor.instrument_app(
+        app,
+        excluded_urls=TRACING_EXCLUDED_URLS,
+        meter_provider=NoOpMeterProvider()
+    )
     HTTPXClientInstrumentor().instrument()
 
     print("✅ OpenTelemetry observability initialized successfully!")
     print("   - Distributed tracing enabled with correlation ID support")
-    print("   - Metrics collection active with 5-second export intervals")
+    print("   - Metrics collection active with 30-second delta exports")
     print("   - Automatic instrumentation for FastAPI and HTTPX")
     print("   - Service attribution: document-api v1.0.0 (development)")
     print("   - Exporting to: otel-collector:4317")
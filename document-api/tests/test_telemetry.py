@@ -0,0 +1,54 @@
+"""
+Tests for the Document API tracing configuration.
+"""
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace import SpanKind
+
+from telemetry import TRACING_EXCLUDED_URLS
+
+
+def _traced_client():
+    """Return a test client for an app instrumented like the Document API, and its span exporter."""
+    app = FastAPI()
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    @app.put("/clients/{client_id}/upload-document")
+    async def upload_document(client_id: str):
+        return {"client_id": client_id}
+
+    exporter = InMemorySpanExporter()
+    tracer_provider = TracerProvider()
+    tracer_provider.add_span_processor(SimpleSpanProcessor(exporter))
+    FastAPIInstrumentor.instrument_app(
+        app, excluded_urls=TRACING_EXCLUDED_URLS, tracer_provider=tracer_provider
+    )
+    return TestClient(app), exporter
+
+
+def _server_spans(exporter):
+    return [span for span in exporter.get_finished_spans() if span.kind == SpanKind.SERVER]
+
+
+def test_health_is_not_traced():
+    client, exporter = _traced_client()
+
+    assert client.get("/health").status_code == 200
+
+    assert _server_spans(exporter) == []
+
+
+def test_uploads_for_clients_named_after_health_are_traced():
+    client, exporter = _traced_client()
+
+    assert client.put("/clients/healthcorp/upload-document").status_code == 200
+
+    assert len(_server_spans(exporter)) == 1